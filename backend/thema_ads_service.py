@@ -452,7 +452,10 @@ class ThemaAdsService:
             processor = ThemaAdsProcessor(config, batch_size=batch_size, skip_sd_done_check=is_repair_job)
 
             # Process with custom callback
-            results = await self._process_with_tracking(processor, inputs, job_id)
+            try:
+                results = await self._process_with_tracking(processor, inputs, job_id)
+            finally:
+                await processor.close()
 
             # Update final status
             job_status = self.get_job_status(job_id)
@@ -0,0 +1,44 @@
+"""
+Shared database access for the maintenance scripts.
+"""
+
+import atexit
+import os
+import threading
+
+from psycopg2.pool import ThreadedConnectionPool
+
+# Database connection pool (created lazily, once per process)
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_db_pool() -> ThreadedConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadedConnectionPool(
+                1, 10,
+                os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
+            )
+            atexit.register(_POOL.closeall)
+    return _POOL
+
+
+def get_all_customer_ids():
+    """Get all customer IDs from the database."""
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            # Aggregate server-side so a single row comes back
+            cur.execute("""
+                SELECT array_agg(DISTINCT customer_id ORDER BY customer_id)
+                FROM thema_ads_job_items
+                WHERE customer_id IS NOT NULL
+            """)
+            customer_ids = cur.fetchone()[0] or []
+    finally:
+        pool.putconn(conn)
+    return customer_ids
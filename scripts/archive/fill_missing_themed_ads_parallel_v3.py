@@ -15,14 +15,31 @@ import psycopg2
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
 import json
+import time
 from typing import Dict, List, Set, Tuple
 from datetime import datetime
 
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the timestamp at most once per second."""
+
+    _last_second = None
+    _last_time_str = ''
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_time_str = time.strftime('%Y-%m-%d %H:%M:%S', self.converter(record.created))
+        return self._last_time_str
+
+
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
-)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+logging.logThreads = False
+logging.logProcesses = False
 logger = logging.getLogger(__name__)
 
 # Load environment
@@ -47,6 +64,12 @@ PROGRESS_FILE = Path(__file__).parent / "fill_missing_progress_v3.json"
 # Batch size for API operations
 BATCH_SIZE = 100
 
+# Emit a running totals line once per this many completed customers
+SUMMARY_EVERY = 25
+
+# Set SKIP_CONFIRM=true to run --execute without the interactive prompt
+SKIP_CONFIRM = os.getenv("SKIP_CONFIRM", "false").lower() == "true"
+
 
 def load_progress():
     """Load progress from file."""
@@ -343,9 +366,8 @@ def process_single_customer(args):
     }
 
     try:
-        logger.info(f"\n{'='*80}")
-        logger.info(f"[{idx}/{total_customers}] Processing customer {customer_id}")
-        logger.info(f"{'='*80}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[{idx}/{total_customers}] Processing customer {customer_id}")
 
         # Find all ad groups with at least one THEME_*_DONE label
         query = """
@@ -359,19 +381,20 @@ def process_single_customer(args):
                 AND ad_group.status = ENABLED
         """
 
-        response = ga_service.search(customer_id=customer_id, query=query)
+        stream = ga_service.search_stream(customer_id=customer_id, query=query)
 
         # Group by ad group
         ad_groups = {}
-        for row in response:
-            ag_id = str(row.ad_group.id)
-            if ag_id not in ad_groups:
-                ad_groups[ag_id] = {
-                    'name': row.ad_group.name,
-                    'campaign': row.ad_group.campaign,
-                    'labels': set()
-                }
-            ad_groups[ag_id]['labels'].add(row.label.name)
+        for batch in stream:
+            for row in batch.results:
+                ag_id = str(row.ad_group.id)
+                if ag_id not in ad_groups:
+                    ad_groups[ag_id] = {
+                        'name': row.ad_group.name,
+                        'campaign': row.ad_group.campaign,
+                        'labels': set()
+                    }
+                ad_groups[ag_id]['labels'].add(row.label.name)
 
         logger.info(f"Found {len(ad_groups)} ad groups with THEME_*_DONE labels")
 
@@ -415,11 +438,14 @@ def process_single_customer(args):
                 LIMIT 1
             """
 
-            ad_response = ga_service.search(customer_id=customer_id, query=ad_query)
+            ad_stream = ga_service.search_stream(customer_id=customer_id, query=ad_query)
             base_ad = None
-            for row in ad_response:
-                base_ad = row.ad_group_ad.ad
-                break
+            for batch in ad_stream:
+                for row in batch.results:
+                    base_ad = row.ad_group_ad.ad
+                    break
+                if base_ad:
+                    break
 
             if not base_ad:
                 logger.warning(f"    No base ad found, skipping")
@@ -440,8 +466,9 @@ def process_single_customer(args):
             processed_count += 1
 
         result['success'] = True
-        logger.info(f"\n  Customer {customer_id} Summary: Processed {result['ad_groups_processed']} ad groups, "
-                   f"created {result['ads_created']} themed ads")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Customer {customer_id} Summary: Processed {result['ad_groups_processed']} ad groups, "
+                         f"created {result['ads_created']} themed ads")
 
     except Exception as e:
         logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
@@ -488,10 +515,11 @@ def main():
         logger.info("=" * 80)
         logger.info(f"EXECUTE MODE (PARALLEL: {args.parallel} workers, BATCH SIZE: {BATCH_SIZE})")
         logger.info("=" * 80)
-        response = input("Are you sure you want to proceed? (yes/no): ")
-        if response.lower() != 'yes':
-            logger.info("Aborted")
-            return
+        if not SKIP_CONFIRM:
+            response = input("Are you sure you want to proceed? (yes/no): ")
+            if response.lower() != 'yes':
+                logger.info("Aborted")
+                return
 
     # Get all customer IDs
     logger.info("Fetching customer IDs from database...")
@@ -561,8 +589,9 @@ def main():
                         all_completed = list(completed_customers) + newly_completed
                         save_progress(all_completed)
 
-                    logger.info(f"✓ Completed customer {result['customer_id']} ({completed_count}/{len(customer_ids)}) - "
-                               f"{result['ad_groups_processed']} ad groups, {result['ads_created']} ads created")
+                    if completed_count % SUMMARY_EVERY == 0 or completed_count == len(customer_ids):
+                        logger.info(f"✓ Completed {completed_count}/{len(customer_ids)} customers - "
+                                   f"{total_ad_groups} ad groups, {total_ads_created} ads created so far")
                 else:
                     failed_customers.append((result['customer_id'], result['error']))
                     logger.error(f"✗ Failed customer {result['customer_id']} ({completed_count}/{len(customer_ids)})")
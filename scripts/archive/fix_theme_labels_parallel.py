@@ -14,17 +14,21 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
-import psycopg2
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import Dict, List, Set, Tuple
-from collections import defaultdict
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import hashlib
+import itertools
 import os
 import re
+import time
+
+from google.api_core.exceptions import DeadlineExceeded, ServiceUnavailable
 
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
@@ -36,6 +40,8 @@ load_dotenv(env_path)
 sys.path.insert(0, str(Path(__file__).parent / "thema_ads_optimized"))
 sys.path.insert(0, str(Path(__file__).parent))
 
+from db_pool import get_db_pool
+
 # Theme mappings
 THEME_KEYWORDS = {
     'black_friday': 'THEME_BF',
@@ -47,22 +53,35 @@ THEME_KEYWORDS = {
 
 THEME_LABELS = set(THEME_KEYWORDS.values())
 
+# Label fetches retry only transient RPC failures (UNAVAILABLE, DEADLINE_EXCEEDED),
+# backing off 1s -> 16s; anything else propagates to the per-customer handler
+TRANSIENT_ERRORS = (ServiceUnavailable, DeadlineExceeded)
+LABEL_FETCH_ATTEMPTS = 5
+LABEL_FETCH_MAX_DELAY = 16.0
+
+# Single case-insensitive alternation; the named group that matched is the theme label
+THEME_URL_RE = re.compile(
+    '|'.join(f'(?P<{label}>{re.escape(keyword)})' for keyword, label in THEME_KEYWORDS.items()),
+    re.IGNORECASE
+)
+
 
-def get_all_customer_ids():
-    """Get all customer IDs from the database."""
-    conn = psycopg2.connect(
-        os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
-    )
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT DISTINCT customer_id
-        FROM thema_ads_job_items
-        WHERE customer_id IS NOT NULL
-        ORDER BY customer_id
-    """)
-    customer_ids = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return customer_ids
+def get_all_customer_ids() -> Iterator[str]:
+    """Yield all customer IDs from the database using a server-side cursor."""
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor(name='customer_id_stream') as cur:
+            cur.execute("""
+                SELECT DISTINCT customer_id
+                FROM thema_ads_job_items
+                WHERE customer_id IS NOT NULL
+                ORDER BY customer_id
+            """)
+            for row in cur:
+                yield row[0]
+    finally:
+        pool.putconn(conn)
 
 
 def detect_theme_from_url(url: str) -> str:
@@ -78,22 +97,77 @@ def detect_theme_from_url(url: str) -> str:
     if not url:
         return None
 
-    # Extract path from URL (after domain)
-    # Example: https://www.beslist.nl/products/black_friday/... → black_friday
-    url_lower = url.lower()
+    # Example: https://www.beslist.nl/products/black_friday/... → THEME_BF
+    match = THEME_URL_RE.search(url)
+    return match.lastgroup if match else None
+
+
+def get_ad_content_signature(headlines: List[str], descriptions: List[str]) -> bytes:
+    """Create a 16-byte BLAKE2b digest of ad content to identify duplicates."""
+    h = hashlib.blake2b(digest_size=16)
+    for text in sorted(headlines):
+        h.update(text.encode())
+        h.update(b'\x00')
+    h.update(b'||')
+    for text in sorted(descriptions):
+        h.update(text.encode())
+        h.update(b'\x00')
+    return h.digest()
+
+
+def build_ad_group_filter(customer_id: str, ag_ids: List[str]) -> Tuple[str, Optional[Set[str]]]:
+    """
+    Build the ad group WHERE predicate for a batch of ad group IDs.
+
+    Dense batches use a numeric BETWEEN range, which keeps the query short;
+    sparse batches fall back to an IN list of resource names.
+
+    Returns:
+        Tuple of (predicate, set of requested IDs to post-filter on, or None for IN lists)
+    """
+    numeric_ids = sorted(int(ag_id) for ag_id in ag_ids)
+    min_id, max_id = numeric_ids[0], numeric_ids[-1]
+
+    if (max_id - min_id) / len(numeric_ids) < 2:
+        return f"ad_group.id BETWEEN {min_id} AND {max_id}", set(ag_ids)
 
-    for keyword, label in THEME_KEYWORDS.items():
-        if keyword in url_lower:
-            return label
+    prefix = f"'customers/{customer_id}/adGroups/"
+    in_clause = ", ".join([prefix + ag_id + "'" for ag_id in ag_ids])
+    return f"ad_group_ad.ad_group IN ({in_clause})", None
 
-    return None
 
+def stream_rows(client, ga_service, customer_id: str, query: str):
+    """Yield rows for a query from a single SearchGoogleAdsStream request."""
+    request = client.get_type("SearchGoogleAdsStreamRequest")
+    request.customer_id = customer_id
+    request.query = query
+    for response_batch in ga_service.search_stream(request=request):
+        yield from response_batch.results
 
-def get_ad_content_signature(headlines: List[str], descriptions: List[str]) -> str:
-    """Create a signature for ad content to identify duplicates."""
-    h_sorted = tuple(sorted(headlines))
-    d_sorted = tuple(sorted(descriptions))
-    return f"{h_sorted}||{d_sorted}"
+
+def fetch_label_chunk(customer_id: str, query: str, ga_service, ad_labels: Dict[str, Set[str]]):
+    """Stream one chunk of ad labels into ad_labels, retrying transient failures.
+
+    A retry re-streams the whole chunk; rows already added are simply added again.
+    """
+    delay = 1.0
+    for attempt in range(1, LABEL_FETCH_ATTEMPTS + 1):
+        try:
+            stream = ga_service.search_stream(customer_id=customer_id, query=query)
+            for response_batch in stream:
+                for row in response_batch.results:
+                    key = row.ad_group_ad_label.ad_group_ad.rpartition('/')[2]
+                    ad_labels.setdefault(key, set()).add(row.label.name)
+            return
+        except TRANSIENT_ERRORS as e:
+            if attempt == LABEL_FETCH_ATTEMPTS:
+                raise
+            logger.warning(
+                f"Label fetch for customer {customer_id} failed "
+                f"(attempt {attempt}/{LABEL_FETCH_ATTEMPTS}), retrying in {delay:.0f}s: {e}"
+            )
+            time.sleep(delay)
+            delay = min(delay * 2, LABEL_FETCH_MAX_DELAY)
 
 
 def batch_fetch_ad_labels(customer_id: str, ad_ids: List[Tuple[str, str]], ga_service) -> Dict[str, Set[str]]:
@@ -109,87 +183,62 @@ def batch_fetch_ad_labels(customer_id: str, ad_ids: List[Tuple[str, str]], ga_se
     if not ad_ids:
         return ad_labels
 
+    # Customer prefix is bound once; each ad only adds its own suffix
+    prefix = f"'customers/{customer_id}/adGroupAds/"
+
     # Process in batches of 5000
     batch_size = 5000
     for i in range(0, len(ad_ids), batch_size):
         batch = ad_ids[i:i + batch_size]
 
         # Build IN clause
-        ad_resources = [f"'customers/{customer_id}/adGroupAds/{ag_id}~{ad_id}'"
-                       for ag_id, ad_id in batch]
-        in_clause = ", ".join(ad_resources)
+        in_clause = ", ".join([prefix + ag_id + "~" + ad_id + "'" for ag_id, ad_id in batch])
 
-        # Fetch label resources
-        query1 = f"""
+        # Fetch label names directly alongside the ad resource
+        query = f"""
             SELECT
                 ad_group_ad_label.ad_group_ad,
-                ad_group_ad_label.label
+                label.name
             FROM ad_group_ad_label
             WHERE ad_group_ad_label.ad_group_ad IN ({in_clause})
         """
 
-        try:
-            ad_to_label_resources = {}
-            all_label_resources = set()
-
-            response = ga_service.search(customer_id=customer_id, query=query1)
-            for row in response:
-                ad_resource = row.ad_group_ad_label.ad_group_ad
-                key = ad_resource.split('/')[-1]
-                label_resource = row.ad_group_ad_label.label
-
-                if key not in ad_to_label_resources:
-                    ad_to_label_resources[key] = []
-                ad_to_label_resources[key].append(label_resource)
-                all_label_resources.add(label_resource)
-
-            # Batch fetch label names
-            label_resource_to_name = {}
-            if all_label_resources:
-                label_resources_list = [f"'{lr}'" for lr in all_label_resources]
-                label_in_clause = ", ".join(label_resources_list)
-
-                query2 = f"""
-                    SELECT label.resource_name, label.name
-                    FROM label
-                    WHERE label.resource_name IN ({label_in_clause})
-                """
-
-                label_response = ga_service.search(customer_id=customer_id, query=query2)
-                for row in label_response:
-                    label_resource_to_name[row.label.resource_name] = row.label.name
-
-            # Map label names to ads
-            for ad_key, label_resources in ad_to_label_resources.items():
-                if ad_key not in ad_labels:
-                    ad_labels[ad_key] = set()
-                for label_resource in label_resources:
-                    label_name = label_resource_to_name.get(label_resource)
-                    if label_name:
-                        ad_labels[ad_key].add(label_name)
-
-        except Exception as e:
-            logger.warning(f"Failed to batch fetch labels: {e}")
+        fetch_label_chunk(customer_id, query, ga_service, ad_labels)
 
     logger.info(f"Fetched labels for {len(ad_labels)} ads with labels")
     return ad_labels
 
 
-def get_or_create_label(customer_id: str, label_name: str, client) -> str:
-    """Get or create a label, return resource name."""
-    ga_service = client.get_service("GoogleAdsService")
-    query = f"SELECT label.resource_name FROM label WHERE label.name = '{label_name}'"
+def fetch_theme_labels(customer_id: str, ga_service) -> Dict[str, str]:
+    """
+    Fetch all theme labels (plus THEME_CORRECTED) in a single query.
+
+    Returns:
+        Dict mapping label name to resource name
+    """
+    label_names = sorted(THEME_LABELS | {'THEME_CORRECTED'})
+    in_clause = ", ".join(f"'{name}'" for name in label_names)
+    query = f"SELECT label.resource_name, label.name FROM label WHERE label.name IN ({in_clause})"
 
+    label_cache = {}
     try:
         response = ga_service.search(customer_id=customer_id, query=query)
         for row in response:
-            return row.label.resource_name
-    except:
-        pass
+            label_cache[row.label.name] = row.label.resource_name
+    except Exception as e:
+        logger.warning(f"Failed to fetch theme labels: {e}")
+
+    return label_cache
+
+
+def get_or_create_label(customer_id: str, label_name: str, client, label_cache: Dict[str, str]) -> str:
+    """Get a label from the cache or create it, return resource name."""
+    if label_name in label_cache:
+        return label_cache[label_name]
 
     # Create label
     try:
-        label_service = client.get_service("LabelService")
+        label_service = get_service(client, "LabelService")
         label_operation = client.get_type("LabelOperation")
         label = label_operation.create
         label.name = label_name
@@ -198,67 +247,100 @@ def get_or_create_label(customer_id: str, label_name: str, client) -> str:
             customer_id=customer_id,
             operations=[label_operation]
         )
-        return response.results[0].resource_name
+        label_cache[label_name] = response.results[0].resource_name
+        return label_cache[label_name]
     except Exception as e:
         logger.error(f"Failed to create label {label_name}: {e}")
         return None
 
 
-def add_ad_label(customer_id: str, ad_group_id: str, ad_id: str, label_resource: str, client):
-    """Add label to ad."""
-    try:
-        ad_label_service = client.get_service("AdGroupAdLabelService")
-        ad_label_operation = client.get_type("AdGroupAdLabelOperation")
-        ad_label = ad_label_operation.create
-        ad_label.ad_group_ad = f"customers/{customer_id}/adGroupAds/{ad_group_id}~{ad_id}"
-        ad_label.label = label_resource
+# Max operations per mutate request
+MUTATE_BATCH_SIZE = 5000
 
-        ad_label_service.mutate_ad_group_ad_labels(
-            customer_id=customer_id,
-            operations=[ad_label_operation]
-        )
-        logger.info(f"    ✓ Added label to ad {ad_id}")
-    except Exception as e:
-        if "ENTITY_ALREADY_EXISTS" not in str(e):
-            logger.warning(f"Failed to add label to ad {ad_id}: {e}")
+# Concurrent mutate requests per customer
+MUTATE_WORKERS = 8
 
+# Customers processed concurrently; the work is network-bound so oversubscribe the CPUs
+DEFAULT_PARALLEL = (os.cpu_count() or 1) * 2
 
-def remove_ad_label(customer_id: str, ad_group_id: str, ad_id: str, label_resource: str, client):
-    """Remove label from ad."""
-    try:
-        ad_label_service = client.get_service("AdGroupAdLabelService")
-        ad_label_operation = client.get_type("AdGroupAdLabelOperation")
-        ad_label_operation.remove = f"customers/{customer_id}/adGroupAdLabels/{ad_group_id}~{ad_id}~{label_resource.split('/')[-1]}"
 
-        ad_label_service.mutate_ad_group_ad_labels(
-            customer_id=customer_id,
-            operations=[ad_label_operation]
-        )
-        logger.info(f"    ✓ Removed label from ad {ad_id}")
-    except Exception as e:
-        logger.warning(f"Failed to remove label from ad {ad_id}: {e}")
+def build_add_ad_label_op(customer_id: str, ad_group_id: str, ad_id: str, label_resource: str, client):
+    """Build an operation that adds a label to an ad."""
+    ad_label_operation = client.get_type("AdGroupAdLabelOperation")
+    ad_label = ad_label_operation.create
+    ad_label.ad_group_ad = f"customers/{customer_id}/adGroupAds/{ad_group_id}~{ad_id}"
+    ad_label.label = label_resource
+    return ad_label_operation
 
 
-def remove_ad(customer_id: str, ad_resource_name: str, ad_id: str, client):
-    """Remove an ad."""
-    try:
-        ad_service = client.get_service("AdGroupAdService")
-        ad_operation = client.get_type("AdGroupAdOperation")
-        ad_operation.remove = ad_resource_name
+def build_remove_ad_label_op(customer_id: str, ad_group_id: str, ad_id: str, label_resource: str, client):
+    """Build an operation that removes a label from an ad."""
+    ad_label_operation = client.get_type("AdGroupAdLabelOperation")
+    ad_label_operation.remove = f"customers/{customer_id}/adGroupAdLabels/{ad_group_id}~{ad_id}~{label_resource.rpartition('/')[2]}"
+    return ad_label_operation
 
-        ad_service.mutate_ad_group_ads(
-            customer_id=customer_id,
-            operations=[ad_operation]
-        )
-        logger.info(f"    ✓ Removed ad {ad_id}")
+
+def build_remove_ad_op(ad_resource_name: str, client):
+    """Build an operation that removes an ad."""
+    ad_operation = client.get_type("AdGroupAdOperation")
+    ad_operation.remove = ad_resource_name
+    return ad_operation
+
+
+def log_partial_failures(response, description: str, client):
+    """Log partial-failure errors from a mutate response, ignoring ENTITY_ALREADY_EXISTS."""
+    if not response.partial_failure_error or not response.partial_failure_error.code:
+        return
+
+    failure_type = type(client.get_type("GoogleAdsFailure"))
+    for detail in response.partial_failure_error.details:
+        failure = failure_type.deserialize(detail.value)
+        for error in failure.errors:
+            if "ENTITY_ALREADY_EXISTS" not in str(error.error_code):
+                logger.warning(f"Failed to {description}: {error.message}")
+
+
+def mutate_chunk(mutate, customer_id: str, chunk: List, description: str, client) -> int:
+    """Send one chunk of operations with partial_failure enabled, return number of operations sent."""
+    try:
+        response = mutate(customer_id=customer_id, operations=chunk, partial_failure=True)
+        log_partial_failures(response, description, client)
+        return len(chunk)
     except Exception as e:
-        logger.error(f"    ✗ Failed to remove ad {ad_id}: {e}")
+        logger.error(f"    ✗ Failed to {description} ({len(chunk)} operations): {e}")
+        return 0
+
+
+def mutate_in_batches(jobs: List[Tuple], customer_id: str, client) -> Dict[str, int]:
+    """
+    Send (mutate, operations, description) jobs in MUTATE_BATCH_SIZE chunks concurrently.
+
+    Returns:
+        Dict mapping description to number of operations sent
+    """
+    sent = {description: 0 for _, _, description in jobs}
+
+    with ThreadPoolExecutor(max_workers=MUTATE_WORKERS) as executor:
+        future_to_description = {}
+        for mutate, operations, description in jobs:
+            for i in range(0, len(operations), MUTATE_BATCH_SIZE):
+                chunk = operations[i:i + MUTATE_BATCH_SIZE]
+                future = executor.submit(mutate_chunk, mutate, customer_id, chunk, description, client)
+                future_to_description[future] = description
+
+        for future in as_completed(future_to_description):
+            sent[future_to_description[future]] += future.result()
+
+    for description, count in sent.items():
+        if count:
+            logger.info(f"    ✓ Sent {count} operations to {description}")
+    return sent
 
 
 def add_ad_group_label(customer_id: str, ad_group_id: str, label_resource: str, client):
     """Add label to ad group."""
     try:
-        ag_label_service = client.get_service("AdGroupLabelService")
+        ag_label_service = get_service(client, "AdGroupLabelService")
         ag_label_operation = client.get_type("AdGroupLabelOperation")
         ag_label = ag_label_operation.create
         ag_label.ad_group = f"customers/{customer_id}/adGroups/{ad_group_id}"
@@ -274,6 +356,40 @@ def add_ad_group_label(customer_id: str, ad_group_id: str, label_resource: str,
             logger.warning(f"Failed to add label to ad group {ad_group_id}: {e}")
 
 
+# Shared Google Ads client and service handles (set up once by init_client)
+_CLIENT = None
+_SERVICES = {}
+SHARED_SERVICES = (
+    "GoogleAdsService",
+    "LabelService",
+    "AdGroupAdLabelService",
+    "AdGroupAdService",
+    "AdGroupLabelService",
+)
+
+
+def init_client():
+    """Build the Google Ads client and service handles shared by all customer threads."""
+    global _CLIENT
+
+    from config import load_config_from_env
+    from google_ads_client import initialize_client
+
+    config = load_config_from_env()
+    _CLIENT = initialize_client(config.google_ads)
+    _SERVICES.clear()
+    for name in SHARED_SERVICES:
+        _SERVICES[name] = _CLIENT.get_service(name)
+
+
+def get_service(client, name: str):
+    """Return the shared service handle, resolving it on first use."""
+    service = _SERVICES.get(name)
+    if service is None:
+        service = _SERVICES[name] = client.get_service(name)
+    return service
+
+
 def process_single_customer(args):
     """
     Process a single customer to fix theme labels.
@@ -283,13 +399,8 @@ def process_single_customer(args):
     """
     customer_id, idx, total_customers, dry_run = args
 
-    # Import here for multiprocessing
-    from config import load_config_from_env
-    from google_ads_client import initialize_client
-
-    config = load_config_from_env()
-    client = initialize_client(config.google_ads)
-    ga_service = client.get_service("GoogleAdsService")
+    client = _CLIENT
+    ga_service = get_service(client, "GoogleAdsService")
 
     result = {
         'customer_id': customer_id,
@@ -305,16 +416,9 @@ def process_single_customer(args):
         logger.info(f"[{idx}/{total_customers}] Processing customer {customer_id}")
         logger.info(f"{'='*80}")
 
-        # Get THEME_CORRECTED label (check if customer already processed)
-        corrected_label_query = "SELECT label.resource_name FROM label WHERE label.name = 'THEME_CORRECTED'"
-        corrected_label_resource = None
-        try:
-            label_response = ga_service.search(customer_id=customer_id, query=corrected_label_query)
-            for row in label_response:
-                corrected_label_resource = row.label.resource_name
-                break
-        except:
-            pass
+        # Resolve theme labels once; THEME_CORRECTED tells us if customer was already processed
+        label_cache = fetch_theme_labels(customer_id, ga_service)
+        corrected_label_resource = label_cache.get('THEME_CORRECTED')
 
         # Get ad groups with SD_DONE but without THEME_CORRECTED
         ag_query = """
@@ -329,8 +433,10 @@ def process_single_customer(args):
             AND campaign.name LIKE 'HS/%'
         """
 
-        ag_response = ga_service.search(customer_id=customer_id, query=ag_query)
-        all_ad_groups = [(str(row.ad_group.id), row.ad_group.name) for row in ag_response]
+        all_ad_groups = [
+            (str(row.ad_group.id), row.ad_group.name)
+            for row in stream_rows(client, ga_service, customer_id, ag_query)
+        ]
 
         # Filter out already-corrected ad groups
         if corrected_label_resource:
@@ -341,10 +447,9 @@ def process_single_customer(args):
                 WHERE ad_group_label.label = '{corrected_label_resource}'
             """
             try:
-                response = ga_service.search(customer_id=customer_id, query=ag_label_query)
-                for row in response:
+                for row in stream_rows(client, ga_service, customer_id, ag_label_query):
                     ag_resource = row.ad_group_label.ad_group
-                    ag_id = ag_resource.split('/')[-1]
+                    ag_id = ag_resource.rpartition('/')[2]
                     corrected_ags.add(ag_id)
                 logger.info(f"Skipping {len(corrected_ags)} ad groups already corrected")
             except:
@@ -363,8 +468,9 @@ def process_single_customer(args):
 
         # Batch fetch all ads
         logger.info(f"Batch fetching ads from {len(ad_groups)} ad groups...")
-        all_ads_by_ag = {}
-        all_ad_ids = []
+        themed_ads = []
+        themed_ad_ids = []
+        total_ads = 0
         ad_group_names = {ag_id: ag_name for ag_id, ag_name in ad_groups}
 
         batch_size = 1000
@@ -372,8 +478,7 @@ def process_single_customer(args):
             batch_ad_groups = ad_groups[i:i + batch_size]
             ag_ids_in_batch = [ag_id for ag_id, _ in batch_ad_groups]
 
-            ag_resources = [f"'customers/{customer_id}/adGroups/{ag_id}'" for ag_id in ag_ids_in_batch]
-            in_clause = ", ".join(ag_resources)
+            ag_filter, ag_id_set = build_ad_group_filter(customer_id, ag_ids_in_batch)
 
             ads_query = f"""
                 SELECT
@@ -385,159 +490,142 @@ def process_single_customer(args):
                     ad_group_ad.ad.responsive_search_ad.headlines,
                     ad_group_ad.ad.responsive_search_ad.descriptions
                 FROM ad_group_ad
-                WHERE ad_group_ad.ad_group IN ({in_clause})
+                WHERE {ag_filter}
                 AND ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
                 AND ad_group_ad.status != REMOVED
             """
 
             try:
-                ads_response = ga_service.search(customer_id=customer_id, query=ads_query)
-
-                for row in ads_response:
-                    ag_resource = row.ad_group_ad.ad_group
-                    ag_id = ag_resource.split('/')[-1]
-                    ad_id = str(row.ad_group_ad.ad.id)
-                    rsa = row.ad_group_ad.ad.responsive_search_ad
-
-                    # Get first final URL
-                    final_url = row.ad_group_ad.ad.final_urls[0] if row.ad_group_ad.ad.final_urls else None
-
-                    ad_data = {
-                        'ad_id': ad_id,
-                        'resource_name': row.ad_group_ad.resource_name,
-                        'status': str(row.ad_group_ad.status),
-                        'final_url': final_url,
-                        'headlines': [h.text for h in rsa.headlines] if rsa.headlines else [],
-                        'descriptions': [d.text for d in rsa.descriptions] if rsa.descriptions else []
-                    }
-
-                    if ag_id not in all_ads_by_ag:
-                        all_ads_by_ag[ag_id] = {'name': ad_group_names.get(ag_id, 'Unknown'), 'ads': []}
-
-                    all_ads_by_ag[ag_id]['ads'].append(ad_data)
-                    all_ad_ids.append((ag_id, ad_id))
+                ads_stream = ga_service.search_stream(customer_id=customer_id, query=ads_query)
+
+                for response_batch in ads_stream:
+                    for row in response_batch.results:
+                        ag_id = row.ad_group_ad.ad_group.rpartition('/')[2]
+                        if ag_id_set is not None and ag_id not in ag_id_set:
+                            continue  # Inside the BETWEEN range but not requested
+                        total_ads += 1
+
+                        # Detect theme from first final URL; unthemed ads are never checked
+                        final_url = row.ad_group_ad.ad.final_urls[0] if row.ad_group_ad.ad.final_urls else None
+                        expected_theme = detect_theme_from_url(final_url)
+                        if not expected_theme:
+                            continue
+
+                        ad_id = str(row.ad_group_ad.ad.id)
+                        rsa = row.ad_group_ad.ad.responsive_search_ad
+
+                        # Group by ad group and content signature (for duplicate detection)
+                        signature = get_ad_content_signature(
+                            [h.text for h in rsa.headlines],
+                            [d.text for d in rsa.descriptions]
+                        )
+                        themed_ads.append({
+                            'ag_id': ag_id,
+                            'ad_id': ad_id,
+                            'signature': signature,
+                            'resource_name': row.ad_group_ad.resource_name,
+                            'expected_theme': expected_theme,
+                            'final_url': final_url
+                        })
+                        themed_ad_ids.append((ag_id, ad_id))
 
             except Exception as e:
                 logger.error(f"Error fetching ads for batch: {e}")
                 continue
 
-        logger.info(f"Fetched {len(all_ad_ids)} ads from {len(all_ads_by_ag)} ad groups")
+        logger.info(f"Fetched {total_ads} ads ({len(themed_ad_ids)} with themed URLs)")
 
         # Batch fetch labels
-        ad_labels_dict = batch_fetch_ad_labels(customer_id, all_ad_ids, ga_service)
+        ad_labels_dict = batch_fetch_ad_labels(customer_id, themed_ad_ids, ga_service)
 
         # Process ads for theme issues
         ads_to_fix = []
         ads_to_remove = []
         processed_ad_groups = set()
 
-        for ag_id, ag_data in all_ads_by_ag.items():
-            ag_name = ag_data['name']
-
-            # Group ads by content (for duplicate detection)
-            content_groups = defaultdict(list)
-
-            for ad_data in ag_data['ads']:
-                ad_id = ad_data['ad_id']
-                label_key = f"{ag_id}~{ad_id}"
-                labels = ad_labels_dict.get(label_key, set())
-
-                # Detect theme from URL
-                expected_theme = detect_theme_from_url(ad_data['final_url'])
-
-                if not expected_theme:
-                    continue  # No theme in URL, skip
-
-                # Get current theme labels
-                current_theme_labels = labels & THEME_LABELS
-
-                # Create content signature for duplicate detection
-                signature = get_ad_content_signature(ad_data['headlines'], ad_data['descriptions'])
-
-                ad_info = {
-                    'ad_id': ad_id,
-                    'resource_name': ad_data['resource_name'],
-                    'labels': labels,
-                    'expected_theme': expected_theme,
-                    'current_theme_labels': current_theme_labels,
-                    'signature': signature,
-                    'final_url': ad_data['final_url']
-                }
-
-                content_groups[signature].append(ad_info)
-
-            # Process each content group
-            for signature, ads in content_groups.items():
-                # Find ads with issues
-                issue_ads = []
-                correct_ads = []
-
-                for ad_info in ads:
-                    if ad_info['expected_theme'] not in ad_info['current_theme_labels']:
-                        # Missing or wrong label
-                        issue_ads.append(ad_info)
-                    elif ad_info['expected_theme'] in ad_info['current_theme_labels']:
-                        # Correctly labeled
-                        correct_ads.append(ad_info)
-
-                if not issue_ads:
-                    continue
-
-                # If there are correctly labeled duplicates, remove the issue ads
-                if correct_ads:
-                    for ad_info in issue_ads:
-                        logger.info(f"\n  Ad group {ag_id} ({ag_name}):")
-                        logger.info(f"    Ad {ad_info['ad_id']} has incorrect/missing theme label")
-                        logger.info(f"    URL: {ad_info['final_url']}")
-                        logger.info(f"    Expected: {ad_info['expected_theme']}, Current: {ad_info['current_theme_labels']}")
-                        logger.info(f"    Action: REMOVE (duplicate with correct label exists)")
-                        ads_to_remove.append((ag_id, ad_info))
-                        processed_ad_groups.add(ag_id)
-                else:
-                    # No correct duplicate, fix the first one
-                    ad_info = issue_ads[0]
-                    logger.info(f"\n  Ad group {ag_id} ({ag_name}):")
+        if themed_ads:
+            ads_df = pd.DataFrame(themed_ads)
+            ads_df['current_theme_labels'] = [
+                ad_labels_dict.get(f"{ag_id}~{ad_id}", set()) & THEME_LABELS
+                for ag_id, ad_id in zip(ads_df['ag_id'], ads_df['ad_id'])
+            ]
+            ads_df['has_correct'] = [
+                expected in current
+                for expected, current in zip(ads_df['expected_theme'], ads_df['current_theme_labels'])
+            ]
+
+            # Group by ad group + content: a correctly labeled duplicate means issue ads are removed,
+            # otherwise the first issue ad gets its label fixed and the rest are removed
+            group_keys = ['ag_id', 'signature']
+            ads_df['group_has_correct'] = ads_df.groupby(group_keys, sort=False)['has_correct'].transform('any')
+            issue_df = ads_df[~ads_df['has_correct']]
+            issue_rank = issue_df.groupby(group_keys, sort=False).cumcount()
+            fix_mask = ~issue_df['group_has_correct'] & (issue_rank == 0)
+
+            for ad_info in issue_df[fix_mask].to_dict('records'):
+                ag_id = ad_info['ag_id']
+                logger.info(f"\n  Ad group {ag_id} ({ad_group_names.get(ag_id, 'Unknown')}):")
+                logger.info(f"    Ad {ad_info['ad_id']} has incorrect/missing theme label")
+                logger.info(f"    URL: {ad_info['final_url']}")
+                logger.info(f"    Expected: {ad_info['expected_theme']}, Current: {ad_info['current_theme_labels']}")
+                logger.info(f"    Action: FIX LABEL")
+                ads_to_fix.append((ag_id, ad_info))
+
+            for ad_info in issue_df[~fix_mask].to_dict('records'):
+                ag_id = ad_info['ag_id']
+                logger.info(f"\n  Ad group {ag_id} ({ad_group_names.get(ag_id, 'Unknown')}):")
+                if ad_info['group_has_correct']:
                     logger.info(f"    Ad {ad_info['ad_id']} has incorrect/missing theme label")
                     logger.info(f"    URL: {ad_info['final_url']}")
                     logger.info(f"    Expected: {ad_info['expected_theme']}, Current: {ad_info['current_theme_labels']}")
-                    logger.info(f"    Action: FIX LABEL")
-                    ads_to_fix.append((ag_id, ad_info))
-                    processed_ad_groups.add(ag_id)
+                    logger.info(f"    Action: REMOVE (duplicate with correct label exists)")
+                else:
+                    logger.info(f"    Ad {ad_info['ad_id']} is duplicate with wrong label")
+                    logger.info(f"    Action: REMOVE")
+                ads_to_remove.append((ag_id, ad_info))
 
-                    # Remove other duplicates
-                    for ad_info in issue_ads[1:]:
-                        logger.info(f"\n  Ad group {ag_id} ({ag_name}):")
-                        logger.info(f"    Ad {ad_info['ad_id']} is duplicate with wrong label")
-                        logger.info(f"    Action: REMOVE")
-                        ads_to_remove.append((ag_id, ad_info))
+            processed_ad_groups = set(issue_df['ag_id'])
 
         logger.info(f"\nSummary: {len(ads_to_fix)} ads to fix, {len(ads_to_remove)} ads to remove")
 
         if not dry_run:
-            # Execute fixes
+            # Build label fixes
+            create_ops = []
+            remove_label_ops = []
             for ag_id, ad_info in ads_to_fix:
                 # Remove wrong labels
                 for wrong_label in ad_info['current_theme_labels']:
                     if wrong_label != ad_info['expected_theme']:
-                        label_resource = get_or_create_label(customer_id, wrong_label, client)
+                        label_resource = get_or_create_label(customer_id, wrong_label, client, label_cache)
                         if label_resource:
-                            remove_ad_label(customer_id, ag_id, ad_info['ad_id'], label_resource, client)
+                            remove_label_ops.append(
+                                build_remove_ad_label_op(customer_id, ag_id, ad_info['ad_id'], label_resource, client)
+                            )
 
                 # Add correct label
-                label_resource = get_or_create_label(customer_id, ad_info['expected_theme'], client)
+                label_resource = get_or_create_label(customer_id, ad_info['expected_theme'], client, label_cache)
                 if label_resource:
-                    add_ad_label(customer_id, ag_id, ad_info['ad_id'], label_resource, client)
+                    create_ops.append(
+                        build_add_ad_label_op(customer_id, ag_id, ad_info['ad_id'], label_resource, client)
+                    )
 
                 result['ads_fixed'] += 1
 
-            # Execute removals
-            for ag_id, ad_info in ads_to_remove:
-                remove_ad(customer_id, ad_info['resource_name'], ad_info['ad_id'], client)
-                result['ads_removed'] += 1
+            remove_ad_ops = [build_remove_ad_op(ad_info['resource_name'], client) for _, ad_info in ads_to_remove]
+
+            # Execute in batched mutates
+            ad_label_service = get_service(client, "AdGroupAdLabelService")
+            ad_service = get_service(client, "AdGroupAdService")
+            sent = mutate_in_batches([
+                (ad_label_service.mutate_ad_group_ad_labels, remove_label_ops, "remove ad labels"),
+                (ad_label_service.mutate_ad_group_ad_labels, create_ops, "add ad labels"),
+                (ad_service.mutate_ad_group_ads, remove_ad_ops, "remove ads"),
+            ], customer_id, client)
+            result['ads_removed'] += sent["remove ads"]
 
             # Add THEME_CORRECTED label to processed ad groups
             if processed_ad_groups:
-                corrected_label = get_or_create_label(customer_id, "THEME_CORRECTED", client)
+                corrected_label = get_or_create_label(customer_id, "THEME_CORRECTED", client, label_cache)
                 if corrected_label:
                     logger.info(f"\nAdding THEME_CORRECTED label to {len(processed_ad_groups)} ad groups...")
                     for ag_id in processed_ad_groups:
@@ -563,7 +651,8 @@ def main():
     parser = argparse.ArgumentParser(description='Fix theme labels on ads with themed URLs (PARALLEL)')
     parser.add_argument('--execute', action='store_true', help='Actually make changes (default is dry-run)')
     parser.add_argument('--customer-limit', type=int, help='Limit number of customers to process (for testing)')
-    parser.add_argument('--parallel', type=int, default=3, help='Number of customers to process in parallel (default: 3)')
+    parser.add_argument('--parallel', type=int, default=DEFAULT_PARALLEL,
+                        help=f'Number of customers to process in parallel (default: {DEFAULT_PARALLEL})')
 
     args = parser.parse_args()
     dry_run = not args.execute
@@ -583,10 +672,7 @@ def main():
 
     # Get all customer IDs
     logger.info("Fetching customer IDs from database...")
-    customer_ids = get_all_customer_ids()
-
-    if args.customer_limit:
-        customer_ids = customer_ids[:args.customer_limit]
+    customer_ids = list(itertools.islice(get_all_customer_ids(), args.customer_limit))
 
     logger.info(f"Found {len(customer_ids)} customers to process")
     logger.info(f"Using {args.parallel} parallel workers")
@@ -603,11 +689,14 @@ def main():
     failed_customers = []
     completed = 0
 
+    # One client for all threads; gRPC channels multiplex concurrent calls
+    init_client()
+
     logger.info("\n" + "=" * 80)
     logger.info("Starting parallel processing...")
     logger.info("=" * 80)
 
-    with ProcessPoolExecutor(max_workers=args.parallel) as executor:
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
         future_to_customer = {
             executor.submit(process_single_customer, arg): arg[0]
             for arg in customer_args
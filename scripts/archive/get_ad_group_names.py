@@ -34,24 +34,22 @@ ad_group_ids = [
 
 print(f"Fetching ad group names for customer {customer_id}...\n")
 
-for ad_group_id in ad_group_ids:
-    query = f"""
-        SELECT
-            ad_group.id,
-            ad_group.name,
-            campaign.name
-        FROM ad_group
-        WHERE ad_group.id = {ad_group_id}
-        LIMIT 1
-    """
-
-    try:
-        response = ga_service.search(customer_id=customer_id, query=query)
-        for row in response:
-            print(f"Campaign: {row.campaign.name}")
-            print(f"Ad Group ID: {row.ad_group.id}")
-            print(f"Ad Group Name: {row.ad_group.name}")
-            print("-" * 50)
-    except Exception as e:
-        print(f"Error fetching ad group {ad_group_id}: {e}")
+query = f"""
+    SELECT
+        ad_group.id,
+        ad_group.name,
+        campaign.name
+    FROM ad_group
+    WHERE ad_group.id IN ({", ".join(ad_group_ids)})
+"""
+
+try:
+    response = ga_service.search(customer_id=customer_id, query=query)
+    for row in response:
+        print(f"Campaign: {row.campaign.name}")
+        print(f"Ad Group ID: {row.ad_group.id}")
+        print(f"Ad Group Name: {row.ad_group.name}")
         print("-" * 50)
+except Exception as e:
+    print(f"Error fetching ad groups: {e}")
+    print("-" * 50)
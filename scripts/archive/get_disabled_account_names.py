@@ -43,14 +43,15 @@ error_customer_ids = [
 manager_account_id = "1103539935"
 ga_service = client.get_service("GoogleAdsService")
 
-# Query for customer names
-customer_query = """
+# Query for customer names (filtered server-side to the error accounts)
+customer_query = f"""
     SELECT
         customer_client.descriptive_name,
         customer_client.id,
         customer_client.status
     FROM customer_client
     WHERE customer_client.manager = FALSE
+    AND customer_client.id IN ({', '.join(error_customer_ids)})
 """
 
 response = ga_service.search(customer_id=manager_account_id, query=customer_query)
@@ -62,14 +63,13 @@ print("-" * 80)
 error_accounts_found = []
 for row in response:
     customer_id = str(row.customer_client.id)
-    if customer_id in error_customer_ids:
-        name = row.customer_client.descriptive_name
-        status = row.customer_client.status.name
-        error_accounts_found.append({
-            'id': customer_id,
-            'name': name,
-            'status': status
-        })
-        print(f"{customer_id:<15} {status:<20} {name}")
+    name = row.customer_client.descriptive_name
+    status = row.customer_client.status.name
+    error_accounts_found.append({
+        'id': customer_id,
+        'name': name,
+        'status': status
+    })
+    print(f"{customer_id:<15} {status:<20} {name}")
 
 print(f"\nTotal: {len(error_accounts_found)} accounts with errors")
@@ -1,8 +1,16 @@
 """
 Investigate specific ad group to see what themed ads it has.
 """
+import asyncio
+import json
+import os
+import re
 import sys
+import time
+import urllib.parse
+from collections import defaultdict
 from pathlib import Path
+import psycopg2
 from dotenv import load_dotenv
 
 # Load environment
@@ -23,54 +31,133 @@ ga_service = client.get_service('GoogleAdsService')
 campaign_id = '20428646061'
 ad_group_pattern = 'kantoorartikelen_558040_14926322'
 
-# Get all customers
-import psycopg2
-import os
-conn = psycopg2.connect(
-    os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
-)
-cur = conn.cursor()
-cur.execute("SELECT DISTINCT customer_id FROM thema_ads_job_items WHERE customer_id IS NOT NULL")
-customer_ids = [str(row[0]) for row in cur.fetchall()]
-conn.close()
+# Campaign -> owning customer, persisted across runs next to the other script caches
+CAMPAIGN_CACHE_FILE = Path.home() / ".cache" / "thema_ads" / "campaign_customer_cache.json"
+CAMPAIGN_CACHE_TTL = 24 * 3600
 
-print(f"Searching for campaign {campaign_id} across {len(customer_ids)} customers...")
 
-# Find the ad group
-found_customer = None
-found_ad_group = None
+def load_campaign_cache():
+    """Load cached campaign_id -> customer_id mapping from disk, unless older than CAMPAIGN_CACHE_TTL."""
+    try:
+        if time.time() - CAMPAIGN_CACHE_FILE.stat().st_mtime < CAMPAIGN_CACHE_TTL:
+            with open(CAMPAIGN_CACHE_FILE, 'r') as f:
+                return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read campaign cache {CAMPAIGN_CACHE_FILE}: {e}")
+    return {}
+
+
+def save_campaign_cache(cache):
+    """Write campaign_id -> customer_id mapping to disk (temp file + os.replace, like utils.cache)."""
+    try:
+        CAMPAIGN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = CAMPAIGN_CACHE_FILE.with_name(f"{CAMPAIGN_CACHE_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, CAMPAIGN_CACHE_FILE)
+    except OSError as e:
+        print(f"Warning: could not write campaign cache {CAMPAIGN_CACHE_FILE}: {e}")
+
+
+def get_all_customer_ids():
+    """Get all customers from the job items table."""
+    conn = psycopg2.connect(
+        os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
+    )
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT array_agg(DISTINCT customer_id) FROM thema_ads_job_items WHERE customer_id IS NOT NULL")
+        return [str(customer_id) for customer_id in cur.fetchone()[0] or []]
+    finally:
+        conn.close()
+
+
+# Ad group lookup within a campaign; only the IDs and name pattern vary
+AD_GROUP_SEARCH_QUERY_TMPL = '''
+    SELECT
+        ad_group.id,
+        ad_group.name,
+        campaign.name
+    FROM ad_group
+    WHERE campaign.id = {campaign_id}
+        AND ad_group.name LIKE '%{ad_group_pattern}%'
+    LIMIT 1
+'''
+
+# Max customers probed concurrently
+PROBE_CONCURRENCY = 20
+
 
-for customer_id in customer_ids:
+def search_customer(customer_id, query):
+    """Return (customer_id, first row) for a customer, or (customer_id, None) if not found."""
     try:
-        query = f'''
-            SELECT
-                ad_group.id,
-                ad_group.name,
-                campaign.name
-            FROM ad_group
-            WHERE campaign.id = {campaign_id}
-                AND ad_group.name LIKE '%{ad_group_pattern}%'
-            LIMIT 1
-        '''
         response = ga_service.search(customer_id=customer_id, query=query)
         for row in response:
-            found_customer = customer_id
-            found_ad_group = row.ad_group.id
-            print(f"\n✓ Found ad group in customer: {customer_id}")
-            print(f"  Ad Group ID: {row.ad_group.id}")
-            print(f"  Ad Group Name: {row.ad_group.name}")
-            print(f"  Campaign Name: {row.campaign.name}")
-            break
+            return customer_id, row
     except Exception:
-        continue
+        pass
+    return customer_id, None
 
+
+async def find_ad_group(customer_ids, query):
+    """Probe customers concurrently and return the first (customer_id, row) hit."""
+    semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+    async def probe(customer_id):
+        async with semaphore:
+            return await asyncio.to_thread(search_customer, customer_id, query)
+
+    tasks = [asyncio.create_task(probe(customer_id)) for customer_id in customer_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            customer_id, row = await next_done
+            if row is not None:
+                return customer_id, row
+    finally:
+        # Cancel probes still waiting on the semaphore
+        for task in tasks:
+            task.cancel()
+    return None, None
+
+
+# Find the ad group
+query = AD_GROUP_SEARCH_QUERY_TMPL.format(campaign_id=campaign_id, ad_group_pattern=ad_group_pattern)
+campaign_cache = load_campaign_cache()
+found_customer, found_row = None, None
+
+cached_customer = campaign_cache.get(campaign_id)
+if cached_customer:
+    print(f"Checking cached customer {cached_customer} for campaign {campaign_id}...")
+    found_customer, found_row = search_customer(cached_customer, query)
+    if found_row is None:
+        found_customer = None
+
+if not found_customer:
+    customer_ids = get_all_customer_ids()
+    print(f"Searching for campaign {campaign_id} across {len(customer_ids)} customers...")
+    found_customer, found_row = asyncio.run(find_ad_group(customer_ids, query))
     if found_customer:
-        break
+        campaign_cache[campaign_id] = found_customer
+        save_campaign_cache(campaign_cache)
+
+found_ad_group = None
+
+if found_customer:
+    found_ad_group = found_row.ad_group.id
+    print(f"\n✓ Found ad group in customer: {found_customer}")
+    print(f"  Ad Group ID: {found_row.ad_group.id}")
+    print(f"  Ad Group Name: {found_row.ad_group.name}")
+    print(f"  Campaign Name: {found_row.campaign.name}")
 
 if not found_customer:
     print("ERROR: Ad group not found in any customer!")
     sys.exit(1)
 
+# Only the path1 query parameter is needed, so skip full URL parsing
+PATH1_RE = re.compile(r'[?&]path1=([^&#]*)')
+
 # Now fetch all RSAs in this ad group
 print(f"\nFetching all RSAs in ad group {found_ad_group}...")
 
@@ -87,25 +174,25 @@ query = f'''
         AND ad_group_ad.status != REMOVED
 '''
 
-response = ga_service.search(customer_id=found_customer, query=query)
+stream = ga_service.search_stream(customer_id=found_customer, query=query)
 
 ads = []
-for row in response:
-    ad_id = row.ad_group_ad.ad.id
-    final_urls = [url for url in row.ad_group_ad.ad.final_urls]
-    url_path1 = None
-    if final_urls:
-        # Extract path1 from URL parameters
-        import urllib.parse
-        parsed = urllib.parse.urlparse(final_urls[0])
-        params = urllib.parse.parse_qs(parsed.query)
-        url_path1 = params.get('path1', [None])[0]
-
-    ads.append({
-        'id': ad_id,
-        'path1': url_path1,
-        'status': row.ad_group_ad.status.name
-    })
+for batch in stream:
+    for row in batch.results:
+        ad_id = row.ad_group_ad.ad.id
+        final_urls = row.ad_group_ad.ad.final_urls
+        first_url = final_urls[0] if final_urls else None
+        url_path1 = None
+        if first_url:
+            # Extract path1 from URL parameters
+            match = PATH1_RE.search(first_url)
+            url_path1 = urllib.parse.unquote_plus(match.group(1)) if match else None
+
+        ads.append({
+            'id': ad_id,
+            'path1': url_path1,
+            'status': row.ad_group_ad.status.name
+        })
 
 print(f"\nFound {len(ads)} RSAs in this ad group:")
 for ad in ads:
@@ -115,8 +202,8 @@ for ad in ads:
 print(f"\nChecking labels on ads...")
 
 if ads:
-    ad_ids = [str(ad['id']) for ad in ads]
-    ad_ids_str = ','.join(ad_ids)
+    # The ad group filter already scopes the query; non-RSA ads are dropped client-side
+    ad_ids = {ad['id'] for ad in ads}
 
     query = f'''
         SELECT
@@ -124,18 +211,16 @@ if ads:
             label.name
         FROM ad_group_ad_label
         WHERE ad_group_ad.ad_group = 'customers/{found_customer}/adGroups/{found_ad_group}'
-            AND ad_group_ad.ad.id IN ({ad_ids_str})
     '''
 
     try:
         response = ga_service.search(customer_id=found_customer, query=query)
-        ad_labels = {}
+        ad_labels = defaultdict(list)
         for row in response:
             ad_id = row.ad_group_ad.ad.id
-            label_name = row.label.name
-            if ad_id not in ad_labels:
-                ad_labels[ad_id] = []
-            ad_labels[ad_id].append(label_name)
+            if ad_id not in ad_ids:
+                continue
+            ad_labels[ad_id].append(row.label.name)
 
         print(f"\nLabels by ad:")
         for ad in ads:
@@ -2,11 +2,11 @@
 Remove duplicate RSAs from all customers that have had ads created.
 """
 
+import asyncio
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
-import psycopg2
 
 # Setup logging
 logging.basicConfig(
@@ -19,34 +19,107 @@ logger = logging.getLogger(__name__)
 env_path = Path(__file__).parent / "thema_ads_optimized" / ".env"
 load_dotenv(env_path)
 
-# Initialize Google Ads client
+# Reuse the client and GoogleAdsService channel built by remove_duplicate_ads
 sys.path.insert(0, str(Path(__file__).parent / "thema_ads_optimized"))
 sys.path.insert(0, str(Path(__file__).parent))
-from remove_duplicate_ads import find_duplicate_ads, remove_duplicate_ads
-from config import load_config_from_env
-from google_ads_client import initialize_client
+from remove_duplicate_ads import config, ga_service, find_duplicate_ads, remove_duplicate_ads
+from utils.cache import cached_list
+from db_pool import get_all_customer_ids
 
-config = load_config_from_env()
-client = initialize_client(config.google_ads)
 
+# Customer IDs from the database, cached on disk between runs
+CUSTOMER_IDS_CACHE_FILE = Path.home() / ".cache" / "thema_ads" / "customer_ids.json"
+CUSTOMER_IDS_CACHE_TTL = 3600
 
-def get_all_customer_ids():
-    """Get all customer IDs from the database."""
-    import os
-    # Use DATABASE_URL directly
-    conn = psycopg2.connect(
-        os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
-    )
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT DISTINCT customer_id
-        FROM thema_ads_job_items
-        WHERE customer_id IS NOT NULL
-        ORDER BY customer_id
-    """)
-    customer_ids = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return customer_ids
+
+# customer_client IDs per MCC query, keeps the GAQL IN list well under the length limit
+CUSTOMER_CHUNK_SIZE = 500
+
+
+def filter_active_customers(customer_ids):
+    """
+    Keep only enabled, non-manager customers using MCC-level customer_client queries.
+
+    Ad-level rows cannot be queried across accounts from the MCC, but one
+    customer_client query per chunk drops closed or suspended accounts before
+    any per-customer round trips are made.
+    """
+    mcc_id = config.google_ads.login_customer_id
+    active_ids = set()
+
+    for i in range(0, len(customer_ids), CUSTOMER_CHUNK_SIZE):
+        chunk = customer_ids[i:i + CUSTOMER_CHUNK_SIZE]
+        query = f"""
+            SELECT customer_client.id
+            FROM customer_client
+            WHERE customer_client.id IN ({', '.join(str(cid) for cid in chunk)})
+            AND customer_client.manager = FALSE
+            AND customer_client.status = 'ENABLED'
+        """
+        stream = ga_service.search_stream(customer_id=mcc_id, query=query)
+        for batch in stream:
+            for row in batch.results:
+                active_ids.add(str(row.customer_client.id))
+
+    return [cid for cid in customer_ids if str(cid) in active_ids]
+
+
+async def process_all_customers(customer_ids, dry_run):
+    """
+    Two-stage pipeline: a finder searches customers in order and queues those
+    with duplicates, while a remover mutates the previously queued customer.
+
+    Returns:
+        Tuple of (customers_with_duplicates, total_removed, failed_customers)
+    """
+    found = asyncio.Queue(maxsize=1)
+    failed_customers = []
+    totals = {'customers_with_duplicates': 0, 'removed': 0}
+
+    async def finder():
+        for idx, customer_id in enumerate(customer_ids, 1):
+            logger.info(f"\n{'='*80}")
+            logger.info(f"[{idx}/{len(customer_ids)}] Processing customer {customer_id}")
+            logger.info(f"{'='*80}")
+
+            try:
+                duplicates_by_ag = await asyncio.to_thread(find_duplicate_ads, customer_id, limit=None, skip_labeled=True)
+            except Exception as e:
+                logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
+                failed_customers.append((customer_id, str(e)))
+                continue
+
+            if not duplicates_by_ag:
+                logger.info(f"  No duplicates found for customer {customer_id}")
+                continue
+
+            totals['customers_with_duplicates'] += 1
+            await found.put((customer_id, duplicates_by_ag))
+
+        await found.put(None)
+
+    async def remover():
+        while True:
+            item = await found.get()
+            if item is None:
+                return
+            customer_id, duplicates_by_ag = item
+
+            try:
+                removed_count = await asyncio.to_thread(
+                    remove_duplicate_ads, customer_id, duplicates_by_ag, dry_run=dry_run, add_labels=True
+                )
+                totals['removed'] += removed_count
+
+                logger.info(f"  {'Would remove' if dry_run else 'Removed'} {removed_count} duplicate ads for customer {customer_id}")
+
+            except Exception as e:
+                logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
+                failed_customers.append((customer_id, str(e)))
+
+    await asyncio.gather(finder(), remover())
+
+    return totals['customers_with_duplicates'], totals['removed'], failed_customers
 
 
 def main():
@@ -55,6 +128,7 @@ def main():
     parser = argparse.ArgumentParser(description='Remove duplicate RSAs from all customers')
     parser.add_argument('--execute', action='store_true', help='Actually remove ads (default is dry-run)')
     parser.add_argument('--customer-limit', type=int, help='Limit number of customers to process (for testing)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-query customer IDs instead of using the on-disk cache')
 
     args = parser.parse_args()
 
@@ -75,43 +149,22 @@ def main():
 
     # Get all customer IDs
     logger.info("Fetching customer IDs from database...")
-    customer_ids = get_all_customer_ids()
+    customer_ids = cached_list(
+        CUSTOMER_IDS_CACHE_FILE, get_all_customer_ids, ttl=CUSTOMER_IDS_CACHE_TTL, use_cache=not args.no_cache
+    )
 
     if args.customer_limit:
         customer_ids = customer_ids[:args.customer_limit]
 
-    logger.info(f"Found {len(customer_ids)} customers to process")
-
-    # Process each customer
-    total_removed = 0
-    customers_with_duplicates = 0
-    failed_customers = []
-
-    for idx, customer_id in enumerate(customer_ids, 1):
-        logger.info(f"\n{'='*80}")
-        logger.info(f"[{idx}/{len(customer_ids)}] Processing customer {customer_id}")
-        logger.info(f"{'='*80}")
-
-        try:
-            # Find duplicates
-            duplicates_by_ag = find_duplicate_ads(customer_id, limit=None, skip_labeled=True)
+    logger.info(f"Found {len(customer_ids)} customers in database")
 
-            if not duplicates_by_ag:
-                logger.info(f"  No duplicates found for customer {customer_id}")
-                continue
+    customer_ids = filter_active_customers(customer_ids)
+    logger.info(f"Found {len(customer_ids)} active customers to process")
 
-            customers_with_duplicates += 1
-
-            # Remove duplicates
-            removed_count = remove_duplicate_ads(customer_id, duplicates_by_ag, dry_run=dry_run, add_labels=True)
-            total_removed += removed_count
-
-            logger.info(f"  {'Would remove' if dry_run else 'Removed'} {removed_count} duplicate ads for customer {customer_id}")
-
-        except Exception as e:
-            logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
-            failed_customers.append((customer_id, str(e)))
-            continue
+    # Process customers, searching the next one while the previous one's removals run
+    customers_with_duplicates, total_removed, failed_customers = asyncio.run(
+        process_all_customers(customer_ids, dry_run)
+    )
 
     # Final summary
     logger.info("\n" + "=" * 80)
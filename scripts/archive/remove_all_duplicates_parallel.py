@@ -1,20 +1,18 @@
 """
 Remove duplicate RSAs from all customers that have had ads created.
-PARALLEL VERSION - processes multiple customers simultaneously.
+PARALLEL VERSION - processes multiple customers concurrently with asyncio.
 """
 
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
-import psycopg2
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import os
+import asyncio
 
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
@@ -26,70 +24,53 @@ load_dotenv(env_path)
 sys.path.insert(0, str(Path(__file__).parent / "thema_ads_optimized"))
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Importing remove_duplicate_ads builds the Google Ads client once for the whole run
+from remove_duplicate_ads import find_duplicate_ads, remove_duplicate_ads
+from utils.cache import cached_list
+from db_pool import get_all_customer_ids
 
-def get_all_customer_ids():
-    """Get all customer IDs from the database."""
-    # Use DATABASE_URL directly
-    conn = psycopg2.connect(
-        os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/thema_ads")
-    )
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT DISTINCT customer_id
-        FROM thema_ads_job_items
-        WHERE customer_id IS NOT NULL
-        ORDER BY customer_id
-    """)
-    customer_ids = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return customer_ids
-
-
-def process_single_customer(args):
-    """
-    Process a single customer to find and remove duplicates.
-    This function is designed to run in a separate process.
-
-    Args:
-        args: Tuple of (customer_id, idx, total_customers, dry_run)
 
-    Returns:
-        Dict with results: {'customer_id', 'removed_count', 'success', 'error'}
-    """
-    customer_id, idx, total_customers, dry_run = args
+# Customer IDs from the database, cached on disk between runs
+CUSTOMER_IDS_CACHE_FILE = Path.home() / ".cache" / "thema_ads" / "customer_ids.json"
+CUSTOMER_IDS_CACHE_TTL = 3600
 
-    # Import here to avoid issues with multiprocessing and Google Ads client
-    from remove_duplicate_ads import find_duplicate_ads, remove_duplicate_ads
-    from config import load_config_from_env
-    from google_ads_client import initialize_client
 
-    # Initialize client in this process
-    config = load_config_from_env()
-    client = initialize_client(config.google_ads)
+async def find_customer_duplicates(customer_id, idx, total_customers, result):
+    """
+    Search stage: find duplicate ads for one customer.
 
-    result = {
-        'customer_id': customer_id,
-        'removed_count': 0,
-        'success': False,
-        'error': None,
-        'idx': idx
-    }
+    The Google Ads calls are blocking, so they run in worker threads while the
+    event loop keeps other customers moving.
 
+    Returns:
+        Duplicates by ad group, or None when there is nothing to remove or the search failed
+    """
     try:
         logger.info(f"\n{'='*80}")
         logger.info(f"[{idx}/{total_customers}] Processing customer {customer_id}")
         logger.info(f"{'='*80}")
 
-        # Find duplicates
-        duplicates_by_ag = find_duplicate_ads(customer_id, limit=None, skip_labeled=True)
+        duplicates_by_ag = await asyncio.to_thread(find_duplicate_ads, customer_id, limit=None, skip_labeled=True)
 
         if not duplicates_by_ag:
             logger.info(f"  No duplicates found for customer {customer_id}")
             result['success'] = True
-            return result
+            return None
+
+        return duplicates_by_ag
+
+    except Exception as e:
+        logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
+        result['error'] = str(e)
+        return None
+
 
-        # Remove duplicates
-        removed_count = remove_duplicate_ads(customer_id, duplicates_by_ag, dry_run=dry_run, add_labels=True)
+async def remove_customer_duplicates(customer_id, duplicates_by_ag, dry_run, result):
+    """Mutate stage: remove one customer's duplicate ads and record the count in result."""
+    try:
+        removed_count = await asyncio.to_thread(
+            remove_duplicate_ads, customer_id, duplicates_by_ag, dry_run=dry_run, add_labels=True
+        )
         result['removed_count'] = removed_count
         result['success'] = True
 
@@ -99,7 +80,53 @@ def process_single_customer(args):
         logger.error(f"  Failed to process customer {customer_id}: {e}", exc_info=True)
         result['error'] = str(e)
 
-    return result
+
+async def process_all_customers(customer_ids, dry_run, parallel):
+    """
+    Process customers as a two-stage pipeline.
+
+    `parallel` finders search customers and queue those with duplicates;
+    `parallel` removers drain the queue, so later customers' searches overlap
+    earlier customers' mutates.
+
+    Returns:
+        List of dicts: {'customer_id', 'removed_count', 'success', 'error', 'idx'}
+    """
+    total_customers = len(customer_ids)
+    pending = iter(enumerate(customer_ids, 1))
+    found = asyncio.Queue(maxsize=parallel)
+    results = []
+
+    async def finder():
+        # Finders share one iterator, each pulling the next unclaimed customer
+        for idx, customer_id in pending:
+            result = {
+                'customer_id': customer_id,
+                'removed_count': 0,
+                'success': False,
+                'error': None,
+                'idx': idx
+            }
+            results.append(result)
+            duplicates_by_ag = await find_customer_duplicates(customer_id, idx, total_customers, result)
+            if duplicates_by_ag:
+                await found.put((result, duplicates_by_ag))
+
+    async def remover():
+        while True:
+            item = await found.get()
+            if item is None:
+                return
+            result, duplicates_by_ag = item
+            await remove_customer_duplicates(result['customer_id'], duplicates_by_ag, dry_run, result)
+
+    removers = [asyncio.create_task(remover()) for _ in range(parallel)]
+    await asyncio.gather(*(finder() for _ in range(parallel)))
+    for _ in removers:
+        await found.put(None)
+    await asyncio.gather(*removers)
+
+    return sorted(results, key=lambda r: r['idx'])
 
 
 def main():
@@ -108,6 +135,7 @@ def main():
     parser = argparse.ArgumentParser(description='Remove duplicate RSAs from all customers (PARALLEL)')
     parser.add_argument('--execute', action='store_true', help='Actually remove ads (default is dry-run)')
     parser.add_argument('--customer-limit', type=int, help='Limit number of customers to process (for testing)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-query customer IDs instead of using the on-disk cache')
     parser.add_argument('--parallel', type=int, default=3, help='Number of customers to process in parallel (default: 3)')
 
     args = parser.parse_args()
@@ -129,7 +157,9 @@ def main():
 
     # Get all customer IDs
     logger.info("Fetching customer IDs from database...")
-    customer_ids = get_all_customer_ids()
+    customer_ids = cached_list(
+        CUSTOMER_IDS_CACHE_FILE, get_all_customer_ids, ttl=CUSTOMER_IDS_CACHE_TTL, use_cache=not args.no_cache
+    )
 
     if args.customer_limit:
         customer_ids = customer_ids[:args.customer_limit]
@@ -137,49 +167,24 @@ def main():
     logger.info(f"Found {len(customer_ids)} customers to process")
     logger.info(f"Using {args.parallel} parallel workers")
 
-    # Prepare arguments for parallel processing
-    customer_args = [
-        (customer_id, idx, len(customer_ids), dry_run)
-        for idx, customer_id in enumerate(customer_ids, 1)
-    ]
-
     # Process customers in parallel
     total_removed = 0
     customers_with_duplicates = 0
     failed_customers = []
-    completed = 0
 
     logger.info("\n" + "=" * 80)
     logger.info("Starting parallel processing...")
     logger.info("=" * 80)
 
-    with ProcessPoolExecutor(max_workers=args.parallel) as executor:
-        # Submit all jobs
-        future_to_customer = {
-            executor.submit(process_single_customer, arg): arg[0]
-            for arg in customer_args
-        }
-
-        # Process results as they complete
-        for future in as_completed(future_to_customer):
-            customer_id = future_to_customer[future]
-            completed += 1
-
-            try:
-                result = future.result()
-
-                if result['success']:
-                    if result['removed_count'] > 0:
-                        customers_with_duplicates += 1
-                        total_removed += result['removed_count']
-                    logger.info(f"✓ Completed customer {result['customer_id']} ({completed}/{len(customer_ids)}) - {result['removed_count']} duplicates removed")
-                else:
-                    failed_customers.append((result['customer_id'], result['error']))
-                    logger.error(f"✗ Failed customer {result['customer_id']} ({completed}/{len(customer_ids)})")
-
-            except Exception as e:
-                logger.error(f"✗ Exception processing customer {customer_id}: {e}")
-                failed_customers.append((customer_id, str(e)))
+    results = asyncio.run(process_all_customers(customer_ids, dry_run, args.parallel))
+
+    for result in results:
+        if result['success']:
+            if result['removed_count'] > 0:
+                customers_with_duplicates += 1
+                total_removed += result['removed_count']
+        else:
+            failed_customers.append((result['customer_id'], result['error']))
 
     # Final summary
     logger.info("\n" + "=" * 80)
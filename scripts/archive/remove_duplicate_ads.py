@@ -35,6 +35,8 @@ config = load_config_from_env()
 client = initialize_client(config.google_ads)
 ga_service = client.get_service("GoogleAdsService")
 ad_service = client.get_service("AdGroupAdService")
+label_service = client.get_service("LabelService")
+ag_label_service = client.get_service("AdGroupLabelService")
 
 
 def get_ad_content_signature(headlines: List[str], descriptions: List[str]) -> str:
@@ -162,7 +164,6 @@ def get_or_create_label(customer_id: str, label_name: str) -> str:
 
     # Create label
     try:
-        label_service = client.get_service("LabelService")
         label_operation = client.get_type("LabelOperation")
         label = label_operation.create
         label.name = label_name
@@ -180,7 +181,6 @@ def get_or_create_label(customer_id: str, label_name: str) -> str:
 def add_ad_group_label(customer_id: str, ad_group_id: str, label_resource: str):
     """Add label to ad group."""
     try:
-        ag_label_service = client.get_service("AdGroupLabelService")
         ag_label_operation = client.get_type("AdGroupLabelOperation")
         ag_label = ag_label_operation.create
         ag_label.ad_group = f"customers/{customer_id}/adGroups/{ad_group_id}"
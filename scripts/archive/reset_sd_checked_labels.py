@@ -4,8 +4,12 @@ Reset SD_CHECKED labels to allow check-up function to re-process ad groups.
 This removes all SD_CHECKED labels from ad groups.
 """
 import asyncio
+import json
 import logging
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add thema_ads_optimized to path
@@ -14,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent / "thema_ads_optimized"))
 from dotenv import load_dotenv
 from config import load_config_from_env
 from google_ads_client import initialize_client
+from utils.cache import cached_list
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,98 +27,229 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def remove_sd_checked_labels(customer_ids: list[str]):
-    """Remove all SD_CHECKED labels from ad groups."""
+# Customers processed concurrently
+CUSTOMER_CONCURRENCY = 10
 
-    # Load environment
-    env_path = Path(__file__).parent / "thema_ads_optimized" / ".env"
-    load_dotenv(env_path)
+# Labels per mutate request, and concurrent mutate batches per customer
+MUTATE_BATCH_SIZE = 5000
+MUTATE_WORKERS = 5
 
-    # Initialize
-    config = load_config_from_env()
-    client = initialize_client(config.google_ads)
-    ga_service = client.get_service("GoogleAdsService")
-    ad_group_label_service = client.get_service("AdGroupLabelService")
+# Caps in-flight mutate requests across all customers to stay within API rate limits
+MUTATE_CONCURRENCY = 10
+_mutate_slots = threading.BoundedSemaphore(MUTATE_CONCURRENCY)
+
+
+# MCC customer IDs, cached on disk between runs (skip with --no-cache)
+CUSTOMER_IDS_CACHE_FILE = Path.home() / ".cache" / "thema_ads" / "mcc_customer_ids.json"
+CUSTOMER_IDS_CACHE_TTL = 3600
+
+
+# SD_CHECKED label resource names per customer, persisted between runs (skip with --no-cache).
+# A stale entry is also re-queried when it matches no ad group labels.
+LABEL_CACHE_FILE = Path.home() / ".cache" / "thema_ads" / "sd_checked_label_cache.json"
+LABEL_CACHE_TTL = 3600
+_label_cache: dict[str, str] = {}
+
+
+def load_label_cache(use_cache: bool = True):
+    """Load cached SD_CHECKED resource names from disk, unless older than LABEL_CACHE_TTL."""
+    if not use_cache:
+        return
+    try:
+        if time.time() - LABEL_CACHE_FILE.stat().st_mtime >= LABEL_CACHE_TTL:
+            return
+        with open(LABEL_CACHE_FILE, 'r') as f:
+            _label_cache.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read label cache {LABEL_CACHE_FILE}: {e}")
+
+
+def save_label_cache():
+    """Write cached SD_CHECKED resource names to disk."""
+    try:
+        LABEL_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LABEL_CACHE_FILE, 'w') as f:
+            json.dump(_label_cache, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Could not write label cache {LABEL_CACHE_FILE}: {e}")
+
+
+# Ad group labels pointing at a given label resource; only the resource name varies
+AD_GROUP_LABELS_QUERY_TMPL = """
+    SELECT ad_group_label.resource_name, ad_group.id
+    FROM ad_group_label
+    WHERE ad_group_label.label = '{}'
+"""
+
+
+def get_sd_checked_resource(ga_service, customer_id: str, refresh: bool = False):
+    """Return the customer's SD_CHECKED label resource name (None if missing), memoized.
+
+    refresh=True drops the memoized value and queries the label again.
+    """
+    if refresh:
+        _label_cache.pop(customer_id, None)
+    elif customer_id in _label_cache:
+        return _label_cache[customer_id]
+
+    label_query = """
+        SELECT label.resource_name, label.id, label.name
+        FROM label
+        WHERE label.name = 'SD_CHECKED'
+        LIMIT 1
+    """
+
+    label_response = ga_service.search(customer_id=customer_id, query=label_query)
+    for row in label_response:
+        _label_cache[customer_id] = row.label.resource_name
+        logger.info(f"Customer {customer_id}: Found SD_CHECKED label: {row.label.resource_name}")
+        return row.label.resource_name
+
+    # Not cached, so a label created later is still picked up
+    return None
 
-    total_removed = 0
 
-    for customer_id in customer_ids:
-        logger.info(f"Processing customer {customer_id}")
+def get_ad_group_label_resources(ga_service, customer_id: str, label_resource: str) -> list[str]:
+    """Return the resource names of all ad group labels pointing at label_resource."""
+    query = AD_GROUP_LABELS_QUERY_TMPL.format(label_resource)
+    response = ga_service.search(customer_id=customer_id, query=query)
+    return [row.ad_group_label.resource_name for row in response]
 
+
+def _mutate_batch(client, ad_group_label_service, customer_id: str, batch: list[str], batch_num: int) -> int:
+    """Remove one batch of ad group labels, return number removed."""
+    operations = []
+    for resource in batch:
+        operation = client.get_type("AdGroupLabelOperation")
+        operation.remove = resource
+        operations.append(operation)
+
+    try:
+        with _mutate_slots:
+            response = ad_group_label_service.mutate_ad_group_labels(
+                customer_id=customer_id,
+                operations=operations
+            )
+        removed_count = len(response.results)
+        logger.info(f"Customer {customer_id}: Removed {removed_count} SD_CHECKED labels (batch {batch_num})")
+        return removed_count
+    except Exception as e:
+        logger.error(f"Customer {customer_id}: Error removing labels: {e}")
+        return 0
+
+
+def remove_customer_sd_checked_labels(client, ga_service, ad_group_label_service, customer_id: str) -> int:
+    """Remove all SD_CHECKED labels from one customer's ad groups, return number removed."""
+    logger.info(f"Processing customer {customer_id}")
+    removed = 0
+
+    try:
+        # Find SD_CHECKED label
+        was_cached = customer_id in _label_cache
         try:
-            # Find SD_CHECKED label
-            label_query = """
-                SELECT label.resource_name, label.id, label.name
-                FROM label
-                WHERE label.name = 'SD_CHECKED'
-                LIMIT 1
-            """
-
-            sd_checked_resource = None
-            try:
-                label_response = ga_service.search(customer_id=customer_id, query=label_query)
-                for row in label_response:
-                    sd_checked_resource = row.label.resource_name
-                    logger.info(f"Customer {customer_id}: Found SD_CHECKED label: {sd_checked_resource}")
-                    break
-            except Exception as e:
-                logger.warning(f"Customer {customer_id}: Could not find SD_CHECKED label: {e}")
-                continue
-
-            if not sd_checked_resource:
-                logger.info(f"Customer {customer_id}: No SD_CHECKED label found, skipping")
-                continue
-
-            # Find all ad group labels with SD_CHECKED
-            ad_group_labels_query = f"""
-                SELECT ad_group_label.resource_name, ad_group.id
-                FROM ad_group_label
-                WHERE ad_group_label.label = '{sd_checked_resource}'
-            """
-
-            ad_group_label_resources = []
-            try:
-                agl_response = ga_service.search(customer_id=customer_id, query=ad_group_labels_query)
-                for row in agl_response:
-                    ad_group_label_resources.append(row.ad_group_label.resource_name)
-            except Exception as e:
-                logger.error(f"Customer {customer_id}: Error querying ad group labels: {e}")
-                continue
-
-            if not ad_group_label_resources:
-                logger.info(f"Customer {customer_id}: No ad groups with SD_CHECKED label")
-                continue
-
-            logger.info(f"Customer {customer_id}: Found {len(ad_group_label_resources)} ad groups with SD_CHECKED label")
-
-            # Remove labels in batches
-            batch_size = 5000
-            for i in range(0, len(ad_group_label_resources), batch_size):
-                batch = ad_group_label_resources[i:i + batch_size]
-
-                operations = []
-                for resource in batch:
-                    operation = client.get_type("AdGroupLabelOperation")
-                    operation.remove = resource
-                    operations.append(operation)
-
-                try:
-                    response = ad_group_label_service.mutate_ad_group_labels(
-                        customer_id=customer_id,
-                        operations=operations
-                    )
-                    removed_count = len(response.results)
-                    total_removed += removed_count
-                    logger.info(f"Customer {customer_id}: Removed {removed_count} SD_CHECKED labels (batch {i//batch_size + 1})")
-                except Exception as e:
-                    logger.error(f"Customer {customer_id}: Error removing labels: {e}")
+            sd_checked_resource = get_sd_checked_resource(ga_service, customer_id)
+        except Exception as e:
+            logger.warning(f"Customer {customer_id}: Could not find SD_CHECKED label: {e}")
+            return removed
+
+        if not sd_checked_resource:
+            logger.info(f"Customer {customer_id}: No SD_CHECKED label found, skipping")
+            return removed
 
+        # Find all ad group labels with SD_CHECKED
+        try:
+            ad_group_label_resources = get_ad_group_label_resources(ga_service, customer_id, sd_checked_resource)
+
+            # A cached label may have been deleted and recreated; look it up again before giving up
+            if not ad_group_label_resources and was_cached:
+                fresh_resource = get_sd_checked_resource(ga_service, customer_id, refresh=True)
+                if fresh_resource and fresh_resource != sd_checked_resource:
+                    logger.info(f"Customer {customer_id}: Cached SD_CHECKED label was stale, using {fresh_resource}")
+                    ad_group_label_resources = get_ad_group_label_resources(ga_service, customer_id, fresh_resource)
         except Exception as e:
-            logger.error(f"Customer {customer_id}: Unexpected error: {e}", exc_info=True)
+            logger.error(f"Customer {customer_id}: Error querying ad group labels: {e}")
+            return removed
+
+        if not ad_group_label_resources:
+            logger.info(f"Customer {customer_id}: No ad groups with SD_CHECKED label")
+            return removed
+
+        logger.info(f"Customer {customer_id}: Found {len(ad_group_label_resources)} ad groups with SD_CHECKED label")
+
+        # Remove labels in batches, submitted concurrently
+        batches = [
+            ad_group_label_resources[i:i + MUTATE_BATCH_SIZE]
+            for i in range(0, len(ad_group_label_resources), MUTATE_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=MUTATE_WORKERS) as executor:
+            futures = [
+                executor.submit(_mutate_batch, client, ad_group_label_service, customer_id, batch, batch_num)
+                for batch_num, batch in enumerate(batches, 1)
+            ]
+            for future in as_completed(futures):
+                removed += future.result()
+
+    except Exception as e:
+        logger.error(f"Customer {customer_id}: Unexpected error: {e}", exc_info=True)
+
+    return removed
+
+
+async def remove_sd_checked_labels(customer_ids: list[str], client=None, ga_service=None, use_cache: bool = True):
+    """Remove all SD_CHECKED labels from ad groups, reusing the caller's client and service if given."""
+
+    if client is None:
+        # Load environment
+        env_path = Path(__file__).parent / "thema_ads_optimized" / ".env"
+        load_dotenv(env_path)
+
+        # Initialize
+        config = load_config_from_env()
+        client = initialize_client(config.google_ads)
+    if ga_service is None:
+        ga_service = client.get_service("GoogleAdsService")
+    ad_group_label_service = client.get_service("AdGroupLabelService")
+
+    load_label_cache(use_cache)
+
+    # Blocking API calls run in threads, CUSTOMER_CONCURRENCY customers at a time
+    semaphore = asyncio.Semaphore(CUSTOMER_CONCURRENCY)
+
+    async def process_customer(customer_id: str) -> int:
+        async with semaphore:
+            return await asyncio.to_thread(
+                remove_customer_sd_checked_labels, client, ga_service, ad_group_label_service, customer_id
+            )
+
+    removed_counts = await asyncio.gather(*(process_customer(customer_id) for customer_id in customer_ids))
+    total_removed = sum(removed_counts)
+    save_label_cache()
 
     logger.info(f"Total SD_CHECKED labels removed: {total_removed}")
 
 
+def fetch_mcc_customer_ids(ga_service, mcc_id: str) -> list[str]:
+    """Return the IDs of all enabled, non-manager customers under the MCC."""
+    query = """
+        SELECT
+            customer_client.id,
+            customer_client.descriptive_name
+        FROM customer_client
+        WHERE customer_client.status = 'ENABLED'
+        AND customer_client.manager = false
+    """
+
+    customer_ids = []
+    response = ga_service.search(customer_id=mcc_id, query=query)
+    for row in response:
+        customer_id = str(row.customer_client.id)
+        customer_ids.append(customer_id)
+        logger.info(f"Found customer: {customer_id} - {row.customer_client.descriptive_name}")
+    return customer_ids
+
+
 if __name__ == "__main__":
     # Get MCC customer IDs from config
     env_path = Path(__file__).parent / "thema_ads_optimized" / ".env"
@@ -132,24 +268,14 @@ if __name__ == "__main__":
     ga_service = client.get_service("GoogleAdsService")
 
     # Get all accessible customers
-    customer_ids = []
     logger.info(f"Fetching customers from MCC {mcc_id}")
-
-    query = """
-        SELECT
-            customer_client.id,
-            customer_client.descriptive_name
-        FROM customer_client
-        WHERE customer_client.status = 'ENABLED'
-        AND customer_client.manager = false
-    """
-
     try:
-        response = ga_service.search(customer_id=mcc_id, query=query)
-        for row in response:
-            customer_id = str(row.customer_client.id)
-            customer_ids.append(customer_id)
-            logger.info(f"Found customer: {customer_id} - {row.customer_client.descriptive_name}")
+        customer_ids = cached_list(
+            CUSTOMER_IDS_CACHE_FILE,
+            lambda: fetch_mcc_customer_ids(ga_service, mcc_id),
+            ttl=CUSTOMER_IDS_CACHE_TTL,
+            use_cache='--no-cache' not in sys.argv
+        )
     except Exception as e:
         logger.error(f"Error fetching customers: {e}")
         sys.exit(1)
@@ -157,7 +283,7 @@ if __name__ == "__main__":
     logger.info(f"Found {len(customer_ids)} customers")
 
     # Confirm before proceeding
-    if len(sys.argv) > 1 and sys.argv[1] == '--confirm':
+    if '--confirm' in sys.argv:
         logger.info("Running with --confirm flag, proceeding automatically")
     else:
         print(f"\nThis will remove SD_CHECKED labels from ALL ad groups across {len(customer_ids)} customers.")
@@ -168,4 +294,4 @@ if __name__ == "__main__":
             sys.exit(0)
 
     # Run the removal
-    asyncio.run(remove_sd_checked_labels(customer_ids))
+    asyncio.run(remove_sd_checked_labels(customer_ids, client, ga_service, use_cache='--no-cache' not in sys.argv))
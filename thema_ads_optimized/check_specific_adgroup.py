@@ -2,10 +2,10 @@
 """
 Check specific ad group 174058099183 for duplicates.
 """
+import hashlib
 import os
 import sys
 from pathlib import Path
-from collections import defaultdict
 
 sys.path.insert(0, '/app/thema_ads_optimized')
 
@@ -27,6 +27,16 @@ client = GoogleAdsClient.load_from_dict({
     'use_proto_plus': True
 })
 
+
+def content_key(headlines, descriptions):
+    """16-byte BLAKE2b digest of sorted headlines and descriptions."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update('\x1f'.join(headlines).encode())
+    h.update(b'\x1e')
+    h.update('\x1f'.join(descriptions).encode())
+    return h.digest()
+
+
 customer_id = '6213822688'
 ad_group_id = '174058099183'
 ga_service = client.get_service("GoogleAdsService")
@@ -68,44 +78,49 @@ ads_query = f"""
     AND ad_group_ad.status IN (ENABLED, PAUSED)
 """
 
-ads = []
-response = ga_service.search(customer_id=customer_id, query=ads_query)
-for row in response:
-    ad = row.ad_group_ad.ad
-    rsa = ad.responsive_search_ad
+# Stream ads into content groups; a group list is only built on its second ad
+seen, dups = {}, {}
+total_ads = 0
+stream = ga_service.search_stream(customer_id=customer_id, query=ads_query)
+for batch in stream:
+    for row in batch.results:
+        ad = row.ad_group_ad.ad
+        rsa = ad.responsive_search_ad
 
-    headlines = tuple(sorted(h.text for h in rsa.headlines))
-    descriptions = tuple(sorted(d.text for d in rsa.descriptions))
+        headlines = sorted(h.text for h in rsa.headlines)
+        descriptions = sorted(d.text for d in rsa.descriptions)
 
-    ads.append({
-        'ad_id': ad.id,
-        'status': row.ad_group_ad.status.name,
-        'headlines': headlines,
-        'descriptions': descriptions,
-        'final_urls': list(ad.final_urls)
-    })
+        ad_info = {
+            'ad_id': ad.id,
+            'status': row.ad_group_ad.status.name,
+            'headlines': headlines,
+            'descriptions': descriptions,
+            'final_urls': list(ad.final_urls)
+        }
+        key = content_key(headlines, descriptions)
+        if key in dups:
+            dups[key].append(ad_info)
+        elif key in seen:
+            dups[key] = [seen[key], ad_info]
+        else:
+            seen[key] = ad_info
+        total_ads += 1
 
-print(f"Total ads found: {len(ads)}")
+print(f"Total ads found: {total_ads}")
 print()
 
 # Check for duplicates
-content_map = defaultdict(list)
-for ad in ads:
-    content_key = (ad['headlines'], ad['descriptions'])
-    content_map[content_key].append(ad)
-
 duplicates_found = 0
-for content_key, ad_list in content_map.items():
-    if len(ad_list) > 1:
-        duplicates_found += 1
-        print(f"=== Duplicate Set {duplicates_found} ({len(ad_list)} ads) ===")
-        for i, ad in enumerate(ad_list, 1):
-            print(f"  Ad {i}:")
-            print(f"    ID: {ad['ad_id']}")
-            print(f"    Status: {ad['status']}")
-            print(f"    Headlines (first 2): {', '.join(list(ad['headlines'])[:2])}...")
-            print(f"    Descriptions (first 1): {list(ad['descriptions'])[0]}...")
-        print()
+for ad_list in dups.values():
+    duplicates_found += 1
+    print(f"=== Duplicate Set {duplicates_found} ({len(ad_list)} ads) ===")
+    for i, ad in enumerate(ad_list, 1):
+        print(f"  Ad {i}:")
+        print(f"    ID: {ad['ad_id']}")
+        print(f"    Status: {ad['status']}")
+        print(f"    Headlines (first 2): {', '.join(list(ad['headlines'])[:2])}...")
+        print(f"    Descriptions (first 1): {list(ad['descriptions'])[0]}...")
+    print()
 
 if duplicates_found == 0:
     print("✓ No duplicates found in this ad group")
@@ -8,10 +8,13 @@ keeping the ones with THEME_BF label and removing the unlabeled duplicates from
 
 import asyncio
 import logging
+import re
 import sys
 from pathlib import Path
-from typing import List, Dict, Set
+from dataclasses import dataclass
+from typing import List, Dict, Set, Tuple
 from datetime import datetime
+from itertools import chain
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -22,8 +25,10 @@ load_dotenv()
 
 from google.ads.googleads.client import GoogleAdsClient
 from google.ads.googleads.errors import GoogleAdsException
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
 from google_ads_client import initialize_client
 from config import load_config_from_env
+from utils.retry import is_quota_throttled
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +37,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Black Friday keywords (case-sensitive), matched in a single pass per asset
+BF_KEYWORDS = ('Black Friday', 'black friday', 'BLACK FRIDAY', 'BF', 'Black-Friday')
+BF_KEYWORDS_RE = re.compile('|'.join(re.escape(keyword) for keyword in BF_KEYWORDS))
+
+# GAQL built once; only the THEME_BF_DONE resource name varies per customer
+BF_LABELS_QUERY = """
+    SELECT label.name, label.resource_name
+    FROM label
+    WHERE label.name IN ('THEME_BF_DONE', 'THEME_BF')
+"""
+
+BF_ADS_QUERY_TMPL = """
+    SELECT
+        ad_group.id,
+        ad_group.name,
+        ad_group_ad.ad.id,
+        ad_group_ad.ad.responsive_search_ad.headlines,
+        ad_group_ad.ad.responsive_search_ad.descriptions,
+        ad_group_ad.ad.final_urls,
+        ad_group_ad.status,
+        ad_group_ad.labels
+    FROM ad_group_ad
+    WHERE
+        ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
+        AND ad_group_ad.status != REMOVED
+        AND ad_group.status != REMOVED
+        AND ad_group.labels CONTAINS ANY ('{bf_done_resource}')
+"""
+
+
+@dataclass(slots=True)
+class BfAdRecord:
+    """Black Friday RSA found in a THEME_BF_DONE ad group."""
+    ad_id: str
+    resource_name: str
+    has_theme_bf_label: bool
+    status: str
+    headlines: Tuple[str, ...]
+    final_urls: Tuple[str, ...]
+
 
 class DuplicateAdCleaner:
     """Clean up duplicate Black Friday RSAs."""
@@ -39,8 +84,26 @@ class DuplicateAdCleaner:
     def __init__(self, dry_run: bool = True):
         config = load_config_from_env()
         self.client = initialize_client(config.google_ads)
+        # Raw protobuf client for the large read-only scans
+        self.read_client = initialize_client(config.google_ads, use_proto_plus=False)
+        # Services are resolved once and shared by every customer
+        self.ga_service = self.read_client.get_service("GoogleAdsService")
+        self.ad_group_ad_service = self.client.get_service("AdGroupAdService")
+        self.max_concurrent_operations = config.performance.max_concurrent_operations
+        self.api_retry_attempts = config.performance.api_retry_attempts
+        self.api_retry_delay = config.performance.api_retry_delay
         self.dry_run = dry_run
 
+    @staticmethod
+    def _get_label_resources(ga_service, customer_id: str) -> Dict[str, str]:
+        """Map the BF label names to resource names for the given customer."""
+        try:
+            response = ga_service.search(customer_id=customer_id, query=BF_LABELS_QUERY)
+            return {row.label.name: row.label.resource_name for row in response}
+        except GoogleAdsException as e:
+            logger.error(f"Label lookup failed for customer {customer_id}: {e}")
+            return {}
+
     async def find_duplicates(self, customer_id: str) -> Dict[str, List[dict]]:
         """Find ad groups with duplicate RSAs.
 
@@ -49,95 +112,74 @@ class DuplicateAdCleaner:
         """
         logger.info(f"Scanning customer {customer_id} for duplicate Black Friday RSAs...")
 
-        ga_service = self.client.get_service("GoogleAdsService")
-
-        # Query for all RSAs in ad groups that have THEME_BF_DONE label
-        query = """
-            SELECT
-                ad_group.id,
-                ad_group.name,
-                ad_group_ad.ad.id,
-                ad_group_ad.ad.responsive_search_ad.headlines,
-                ad_group_ad.ad.responsive_search_ad.descriptions,
-                ad_group_ad.ad.final_urls,
-                ad_group_ad.status,
-                ad_group_ad.labels,
-                ad_group.labels
-            FROM ad_group_ad
-            WHERE
-                ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
-                AND ad_group_ad.status != REMOVED
-                AND ad_group.status != REMOVED
-        """
+        ga_service = self.ga_service
+        # Raw protobuf rows carry statuses as plain ints; the proto-plus enum decodes them
+        ad_status_enum = self.client.enums.AdGroupAdStatusEnum
+        loop = asyncio.get_event_loop()
 
-        def _query():
+        # Resolve label resource names; labels on rows are resource names, not label names
+        label_resources = await loop.run_in_executor(
+            None, self._get_label_resources, ga_service, customer_id
+        )
+        bf_done_resource = label_resources.get('THEME_BF_DONE')
+        if not bf_done_resource:
+            logger.info(f"No THEME_BF_DONE label in customer {customer_id}, nothing to check")
+            return {}
+        theme_bf_resource = label_resources.get('THEME_BF')
+
+        # Query only RSAs in ad groups that have THEME_BF_DONE label (were processed)
+        query = BF_ADS_QUERY_TMPL.format(bf_done_resource=bf_done_resource)
+
+        def _scan():
+            """Stream rows and group BF ads per ad group as they arrive."""
+            ad_groups = {}
+            row_count = 0
             try:
-                response = ga_service.search(customer_id=customer_id, query=query)
-                return list(response)
+                stream = ga_service.search_stream(customer_id=customer_id, query=query)
+                for batch in stream:
+                    for row in batch.results:
+                        row_count += 1
+                        rsa = row.ad_group_ad.ad.responsive_search_ad
+
+                        # Check if RSA contains Black Friday content, stopping at the first matching asset
+                        has_bf_content = any(
+                            BF_KEYWORDS_RE.search(asset.text)
+                            for asset in chain(rsa.headlines, rsa.descriptions)
+                        )
+                        if not has_bf_content:
+                            continue
+
+                        ag_id = str(row.ad_group.id)
+                        if ag_id not in ad_groups:
+                            ad_groups[ag_id] = {
+                                'name': row.ad_group.name,
+                                'ads': []
+                            }
+
+                        ad_groups[ag_id]['ads'].append(BfAdRecord(
+                            ad_id=str(row.ad_group_ad.ad.id),
+                            resource_name=row.ad_group_ad.resource_name,
+                            has_theme_bf_label=theme_bf_resource in row.ad_group_ad.labels,
+                            status=ad_status_enum(row.ad_group_ad.status).name,
+                            headlines=tuple(h.text for h in rsa.headlines[:3]),  # Sample
+                            final_urls=tuple(row.ad_group_ad.ad.final_urls)
+                        ))
             except GoogleAdsException as e:
                 logger.error(f"Query failed for customer {customer_id}: {e}")
-                return []
+                return {}, 0
+            return ad_groups, row_count
 
-        loop = asyncio.get_event_loop()
-        rows = await loop.run_in_executor(None, _query)
-
-        logger.info(f"Found {len(rows)} RSAs to analyze")
-
-        # Group ads by ad group
-        ad_groups = {}
-        bf_labeled_ad_groups = set()
-
-        for row in rows:
-            ag_id = str(row.ad_group.id)
-            ad_id = str(row.ad_group_ad.ad.id)
-
-            # Check if ad group has THEME_BF_DONE label
-            ag_labels = [label.split('/')[-1] for label in row.ad_group.labels]
-            if 'THEME_BF_DONE' in ag_labels:
-                bf_labeled_ad_groups.add(ag_id)
-
-            # Check ad labels
-            ad_labels = [label.split('/')[-1] for label in row.ad_group_ad.labels]
-            has_theme_bf = 'THEME_BF' in ad_labels
-
-            # Check if RSA contains Black Friday content
-            headlines = [h.text for h in row.ad_group_ad.ad.responsive_search_ad.headlines]
-            descriptions = [d.text for d in row.ad_group_ad.ad.responsive_search_ad.descriptions]
-
-            # Simple check: look for Black Friday related keywords in headlines
-            bf_keywords = ['Black Friday', 'black friday', 'BLACK FRIDAY', 'BF', 'Black-Friday']
-            has_bf_content = any(
-                any(keyword in text for keyword in bf_keywords)
-                for text in headlines + descriptions
-            )
-
-            if has_bf_content:
-                if ag_id not in ad_groups:
-                    ad_groups[ag_id] = {
-                        'name': row.ad_group.name,
-                        'ads': []
-                    }
+        ad_groups, row_count = await loop.run_in_executor(None, _scan)
 
-                ad_groups[ag_id]['ads'].append({
-                    'ad_id': ad_id,
-                    'resource_name': row.ad_group_ad.resource_name,
-                    'has_theme_bf_label': has_theme_bf,
-                    'status': row.ad_group_ad.status.name,
-                    'headlines': headlines[:3],  # Sample
-                    'final_urls': list(row.ad_group_ad.ad.final_urls)
-                })
+        logger.info(f"Analyzed {row_count} RSAs")
 
         # Find ad groups with duplicates
         duplicates = {}
         for ag_id, data in ad_groups.items():
-            # Only process ad groups with THEME_BF_DONE label (were processed)
-            if ag_id not in bf_labeled_ad_groups:
-                continue
-
             if len(data['ads']) > 1:
                 # Find ads without THEME_BF label (duplicates from Job 172)
-                unlabeled_ads = [ad for ad in data['ads'] if not ad['has_theme_bf_label']]
-                labeled_ads = [ad for ad in data['ads'] if ad['has_theme_bf_label']]
+                unlabeled_ads = [ad for ad in data['ads'] if not ad.has_theme_bf_label]
+                labeled_ads = [ad for ad in data['ads'] if ad.has_theme_bf_label]
 
                 if unlabeled_ads and labeled_ads:
                     duplicates[ag_id] = {
@@ -160,13 +202,10 @@ class DuplicateAdCleaner:
             logger.info("No duplicates to remove")
             return {'removed': 0, 'failed': 0}
 
-        # Collect all unlabeled ad resource names
-        ads_to_remove = []
-        for ag_id, data in duplicates.items():
-            for ad in data['unlabeled']:
-                ads_to_remove.append(ad['resource_name'])
+        # Count unlabeled ads; resource names are streamed to the removers below
+        total_to_remove = sum(len(data['unlabeled']) for data in duplicates.values())
 
-        logger.info(f"Planning to remove {len(ads_to_remove)} unlabeled duplicate RSAs")
+        logger.info(f"Planning to remove {total_to_remove} unlabeled duplicate RSAs")
 
         if self.dry_run:
             logger.info("DRY RUN: Would remove the following ads:")
@@ -176,44 +215,89 @@ class DuplicateAdCleaner:
             if len(duplicates) > 10:
                 logger.info(f"  ... and {len(duplicates) - 10} more ad groups")
 
-            return {'removed': len(ads_to_remove), 'failed': 0, 'dry_run': True}
+            return {'removed': total_to_remove, 'failed': 0, 'dry_run': True}
 
-        # Actually remove ads in batches
-        service = self.client.get_service("AdGroupAdService")
+        # Actually remove ads in batches, keeping up to max_concurrent_operations in flight
+        service = self.ad_group_ad_service
         removed = 0
         failed = 0
 
         BATCH_SIZE = 100
-        for i in range(0, len(ads_to_remove), BATCH_SIZE):
-            batch = ads_to_remove[i:i + BATCH_SIZE]
-
-            def _remove_batch():
-                operations = []
-                for resource_name in batch:
-                    op = self.client.get_type("AdGroupAdOperation")
-                    op.remove = resource_name
-                    operations.append(op)
 
-                try:
-                    response = service.mutate_ad_group_ads(
-                        customer_id=customer_id,
-                        operations=operations
-                    )
-                    return len(response.results), 0
-                except GoogleAdsException as e:
-                    logger.error(f"Batch removal failed: {e}")
-                    return 0, len(batch)
+        def _remove_batch(batch: List[str]):
+            operations = []
+            for resource_name in batch:
+                op = self.client.get_type("AdGroupAdOperation")
+                op.remove = resource_name
+                operations.append(op)
 
-            loop = asyncio.get_event_loop()
-            batch_removed, batch_failed = await loop.run_in_executor(None, _remove_batch)
-
-            removed += batch_removed
-            failed += batch_failed
+            try:
+                response = service.mutate_ad_group_ads(
+                    customer_id=customer_id,
+                    operations=operations
+                )
+                return len(response.results), 0, False
+            except (ServiceUnavailable, ResourceExhausted) as e:
+                # The API is overloaded or throttling rather than rejecting the batch
+                logger.warning(f"Batch removal throttled: {e}")
+                return 0, len(batch), True
+            except GoogleAdsException as e:
+                if is_quota_throttled(e):
+                    logger.warning(f"Batch removal throttled: {e}")
+                    return 0, len(batch), True
+                logger.error(f"Batch removal failed: {e}")
+                return 0, len(batch), False
 
-            logger.info(f"Progress: {removed}/{len(ads_to_remove)} removed, {failed} failed")
+        loop = asyncio.get_event_loop()
 
-            # Small delay between batches
-            await asyncio.sleep(1.0)
+        # At least one attempt, even if API_RETRY_ATTEMPTS is 0
+        attempts = max(1, self.api_retry_attempts)
+
+        async def _remove_with_backoff(batch: List[str]):
+            # Dispatch immediately; only back off when the API signals throttling
+            for attempt in range(attempts):
+                batch_removed, batch_failed, rate_limited = await loop.run_in_executor(None, _remove_batch, batch)
+                if not rate_limited:
+                    break
+                if attempt == attempts - 1:
+                    logger.error(f"Batch removal still rate limited after {attempts} attempts")
+                    break
+                retry_delay = self.api_retry_delay * 2 ** attempt
+                logger.warning(f"Rate limited, retrying batch in {retry_delay:.1f}s")
+                await asyncio.sleep(retry_delay)
+            return batch_removed, batch_failed
+
+        # Bounded queue of batches: the producer never runs far ahead of the removers
+        num_workers = max(1, min(self.max_concurrent_operations, -(-total_to_remove // BATCH_SIZE)))
+        queue = asyncio.Queue(maxsize=num_workers * 2)
+
+        async def _produce():
+            batch = []
+            for data in duplicates.values():
+                for ad in data['unlabeled']:
+                    batch.append(ad.resource_name)
+                    if len(batch) == BATCH_SIZE:
+                        await queue.put(batch)
+                        batch = []
+            if batch:
+                await queue.put(batch)
+            for _ in range(num_workers):
+                await queue.put(None)
+
+        async def _consume():
+            nonlocal removed, failed
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                batch_removed, batch_failed = await _remove_with_backoff(batch)
+
+                removed += batch_removed
+                failed += batch_failed
+
+                logger.info(f"Progress: {removed}/{total_to_remove} removed, {failed} failed")
+
+        await asyncio.gather(_produce(), *(_consume() for _ in range(num_workers)))
 
         return {'removed': removed, 'failed': failed}
 
@@ -275,8 +359,8 @@ async def main():
                 if data['unlabeled']:
                     logger.info(f"    Sample unlabeled ad:")
                     ad = data['unlabeled'][0]
-                    logger.info(f"      Status: {ad['status']}")
-                    logger.info(f"      Headlines: {', '.join(ad['headlines'])}")
+                    logger.info(f"      Status: {ad.status}")
+                    logger.info(f"      Headlines: {', '.join(ad.headlines)}")
 
             # Remove duplicates
             stats = await cleaner.remove_duplicates(customer_id, duplicates)
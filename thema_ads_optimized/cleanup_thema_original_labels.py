@@ -15,10 +15,13 @@ Logic:
 import asyncio
 import logging
 import os
+import re
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from google.ads.googleads.client import GoogleAdsClient
@@ -42,6 +45,40 @@ load_dotenv(env_path)
 THEME_LABELS = ['THEME_BF', 'THEME_CM', 'THEME_SK', 'THEME_KM']  # Excluding THEME_SD (Singles Day)
 THEMA_ORIGINAL_LABEL = 'THEMA_ORIGINAL'
 
+# One bit per label, so an ad's labels fit in a single int
+LABEL_BIT = {name: 1 << i for i, name in enumerate([THEMA_ORIGINAL_LABEL] + THEME_LABELS)}
+THEMA_ORIGINAL_BIT = LABEL_BIT[THEMA_ORIGINAL_LABEL]
+THEME_MASK = sum(LABEL_BIT[name] for name in THEME_LABELS)
+
+# Customers and mutate batches processed concurrently (same settings as the main processor)
+MAX_CONCURRENT_CUSTOMERS = int(os.getenv("MAX_CONCURRENT_CUSTOMERS", "5"))
+MAX_CONCURRENT_OPERATIONS = int(os.getenv("MAX_CONCURRENT_OPERATIONS", "50"))
+
+# GAQL queries are the same for every customer, so they are built once
+LABEL_NAME_IN = ','.join(f"'{label}'" for label in [THEMA_ORIGINAL_LABEL] + THEME_LABELS)
+
+THEMA_ORIGINAL_PROBE_QUERY = f"""
+    SELECT ad_group_ad_label.resource_name
+    FROM ad_group_ad_label
+    WHERE label.name = '{THEMA_ORIGINAL_LABEL}'
+    LIMIT 1
+"""
+
+# All ads with THEMA_ORIGINAL or theme labels
+CONFLICT_SCAN_QUERY = f"""
+    SELECT
+        ad_group_ad.ad.id,
+        ad_group_ad.ad.name,
+        ad_group_ad.resource_name,
+        label.name,
+        label.resource_name
+    FROM ad_group_ad_label
+    WHERE label.name IN ({LABEL_NAME_IN})
+"""
+
+# customers/{customer_id}/adGroupAds/{ad_group_id}~{ad_id}
+AD_RESOURCE_RE = re.compile(r'customers/\d+/adGroupAds/(\d+)~(\d+)')
+
 # Valid customer IDs (from whitelist)
 VALID_CUSTOMERS = [
     '4056770576', '1496704472', '4964513580', '3114657125', '5807833423',
@@ -63,7 +100,9 @@ def initialize_client() -> GoogleAdsClient:
             'client_secret': os.getenv('GOOGLE_CLIENT_SECRET'),
             'login_customer_id': os.getenv('GOOGLE_LOGIN_CUSTOMER_ID'),
             'token_uri': 'https://oauth2.googleapis.com/token',
-            'use_proto_plus': True
+            # Raw protobuf: rows are only read as strings and the remove operations
+            # just take resource names, so the proto-plus wrappers add nothing
+            'use_proto_plus': False
         })
         logger.info("Google Ads client initialized successfully")
         return client
@@ -72,97 +111,86 @@ def initialize_client() -> GoogleAdsClient:
         raise
 
 
-def get_label_ids(client: GoogleAdsClient, customer_id: str) -> Dict[str, str]:
-    """Get label IDs for all relevant labels."""
-    ga_service = client.get_service("GoogleAdsService")
+@lru_cache(maxsize=None)
+def get_service(client: GoogleAdsClient, name: str):
+    """Return the named service for this client, resolved once and reused across customers."""
+    return client.get_service(name)
 
-    # Get all label names we care about
-    all_labels = THEME_LABELS + [THEMA_ORIGINAL_LABEL]
 
-    query = f"""
-        SELECT
-            label.id,
-            label.name
-        FROM label
-        WHERE label.name IN ({','.join(f"'{label}'" for label in all_labels)})
-    """
+def has_thema_original_ads(client: GoogleAdsClient, customer_id: str) -> bool:
+    """Return True if at least one ad carries the THEMA_ORIGINAL label (LIMIT 1 probe)."""
+    ga_service = get_service(client, "GoogleAdsService")
 
-    label_map = {}
     try:
-        response = ga_service.search(customer_id=customer_id, query=query)
-        for row in response:
-            label_map[row.label.name] = row.label.resource_name
-
-        logger.info(f"[{customer_id}] Found {len(label_map)} labels: {list(label_map.keys())}")
-        return label_map
+        response = ga_service.search(customer_id=customer_id, query=THEMA_ORIGINAL_PROBE_QUERY)
+        return any(True for _ in response)
     except GoogleAdsException as ex:
-        logger.error(f"[{customer_id}] Failed to fetch labels: {ex}")
-        return {}
+        # Fall through to the full scan rather than silently skipping the customer
+        logger.warning(f"[{customer_id}] THEMA_ORIGINAL probe failed: {ex}")
+        return True
+
+
+def decode_theme_labels(mask: int) -> Set[str]:
+    """Return the theme label names set in a label bitmask."""
+    return {name for name in THEME_LABELS if mask & LABEL_BIT[name]}
 
 
 def find_ads_with_conflicting_labels(
     client: GoogleAdsClient,
-    customer_id: str,
-    label_ids: Dict[str, str]
-) -> List[Tuple[str, Set[str]]]:
+    customer_id: str
+) -> Tuple[List[Tuple[str, Set[str]]], Optional[str]]:
     """
     Find ads that have both THEMA_ORIGINAL and at least one theme label.
 
+    Label resource names are read from the same ad_group_ad_label rows, so no
+    separate label lookup is needed.
+
     Returns:
-        List of (ad_resource_name, set_of_theme_labels) tuples
-    """
-    if THEMA_ORIGINAL_LABEL not in label_ids:
-        logger.info(f"[{customer_id}] No THEMA_ORIGINAL label found, skipping")
-        return []
-
-    theme_label_ids = {name: rid for name, rid in label_ids.items() if name in THEME_LABELS}
-    if not theme_label_ids:
-        logger.info(f"[{customer_id}] No theme labels found, skipping")
-        return []
-
-    ga_service = client.get_service("GoogleAdsService")
-
-    # Query for all ads with THEMA_ORIGINAL label
-    query = f"""
-        SELECT
-            ad_group_ad.ad.id,
-            ad_group_ad.ad.name,
-            ad_group_ad.resource_name,
-            label.name
-        FROM ad_group_ad_label
-        WHERE label.name IN ({','.join(f"'{label}'" for label in label_ids.keys())})
+        Tuple of (list of (ad_resource_name, set_of_theme_labels), THEMA_ORIGINAL resource name or None)
     """
+    ga_service = get_service(client, "GoogleAdsService")
 
-    # Build map of ad -> labels
-    ad_labels: Dict[str, Set[str]] = defaultdict(set)
+    # Build map of ad -> label bitmask
+    ad_masks: Dict[str, int] = defaultdict(int)
+    label_ids: Dict[str, str] = {}
 
     try:
-        response = ga_service.search(customer_id=customer_id, query=query)
+        response = ga_service.search(customer_id=customer_id, query=CONFLICT_SCAN_QUERY)
         for row in response:
-            ad_resource = row.ad_group_ad.resource_name
             label_name = row.label.name
-            ad_labels[ad_resource].add(label_name)
+            ad_masks[row.ad_group_ad.resource_name] |= LABEL_BIT[label_name]
+            label_ids[label_name] = row.label.resource_name
+
+        if THEMA_ORIGINAL_LABEL not in label_ids:
+            logger.info(f"[{customer_id}] No THEMA_ORIGINAL label found, skipping")
+            return [], None
 
         # Find ads with both THEMA_ORIGINAL and theme labels
-        conflicting_ads = []
-        for ad_resource, labels in ad_labels.items():
-            if THEMA_ORIGINAL_LABEL in labels:
-                theme_labels_present = labels & set(THEME_LABELS)
-                if theme_labels_present:
-                    conflicting_ads.append((ad_resource, theme_labels_present))
+        conflicting_ads = [
+            (ad_resource, decode_theme_labels(mask))
+            for ad_resource, mask in ad_masks.items()
+            if mask & THEMA_ORIGINAL_BIT and mask & THEME_MASK
+        ]
 
         logger.info(
             f"[{customer_id}] Found {len(conflicting_ads)} ads with both "
-            f"THEMA_ORIGINAL and theme labels (out of {len(ad_labels)} total labeled ads)"
+            f"THEMA_ORIGINAL and theme labels (out of {len(ad_masks)} total labeled ads)"
         )
-        return conflicting_ads
+        return conflicting_ads, label_ids[THEMA_ORIGINAL_LABEL]
 
     except GoogleAdsException as ex:
         logger.error(f"[{customer_id}] Failed to query ads: {ex}")
-        return []
+        return [], None
+
 
+def _build_remove_label_op(client: GoogleAdsClient, label_resource: str):
+    """Build an AdGroupAdLabelOperation that removes the given ad_group_ad_label."""
+    operation = client.get_type("AdGroupAdLabelOperation")
+    operation.remove = label_resource
+    return operation
 
-def remove_thema_original_labels(
+
+async def remove_thema_original_labels(
     client: GoogleAdsClient,
     customer_id: str,
     ads_to_fix: List[Tuple[str, Set[str]]],
@@ -172,36 +200,27 @@ def remove_thema_original_labels(
     """
     Remove THEMA_ORIGINAL labels from the specified ads.
 
+    Batches are mutated in worker threads, up to MAX_CONCURRENT_OPERATIONS
+    at a time; a new batch starts as soon as one finishes.
+
     Returns:
         Tuple of (success_count, failure_count)
     """
     if not ads_to_fix:
         return 0, 0
 
-    ad_group_ad_label_service = client.get_service("AdGroupAdLabelService")
-
-    success_count = 0
-    failure_count = 0
+    ad_group_ad_label_service = get_service(client, "AdGroupAdLabelService")
 
     # Build operations to remove THEMA_ORIGINAL label
-    operations = []
-    for ad_resource, theme_labels in ads_to_fix:
-        # Construct the ad_group_ad_label resource name
-        # Format: customers/{customer_id}/adGroupAdLabels/{ad_group_id}~{ad_id}~{label_id}
-        label_id = thema_original_label_id.split('/')[-1]
-        ad_parts = ad_resource.split('~')
-        if len(ad_parts) >= 2:
-            ad_group_id = ad_parts[0].split('/')[-1]
-            ad_id = ad_parts[1]
-
-            label_resource = (
-                f"customers/{customer_id}/adGroupAdLabels/"
-                f"{ad_group_id}~{ad_id}~{label_id}"
-            )
-
-            operation = client.get_type("AdGroupAdLabelOperation")
-            operation.remove = label_resource
-            operations.append(operation)
+    # Format: customers/{customer_id}/adGroupAdLabels/{ad_group_id}~{ad_id}~{label_id}
+    # Customer prefix and label suffix are the same for every ad
+    prefix = f"customers/{customer_id}/adGroupAdLabels/"
+    label_suffix = f"~{thema_original_label_id.rpartition('/')[2]}"
+    matches = (AD_RESOURCE_RE.match(ad_resource) for ad_resource, _ in ads_to_fix)
+    operations = [
+        _build_remove_label_op(client, f"{prefix}{m[1]}~{m[2]}{label_suffix}")
+        for m in matches if m
+    ]
 
     if dry_run:
         logger.info(
@@ -212,27 +231,37 @@ def remove_thema_original_labels(
 
     # Process in batches of 1000
     BATCH_SIZE = 1000
-    for i in range(0, len(operations), BATCH_SIZE):
-        batch = operations[i:i+BATCH_SIZE]
-        try:
-            response = ad_group_ad_label_service.mutate_ad_group_ad_labels(
-                customer_id=customer_id,
-                operations=batch
-            )
-            batch_success = len(response.results)
-            success_count += batch_success
-            logger.info(
-                f"[{customer_id}] Removed THEMA_ORIGINAL from {batch_success} ads "
-                f"(batch {i//BATCH_SIZE + 1}/{(len(operations)-1)//BATCH_SIZE + 1})"
-            )
-        except GoogleAdsException as ex:
-            batch_failure = len(batch)
-            failure_count += batch_failure
-            logger.error(
-                f"[{customer_id}] Failed to remove labels from batch "
-                f"{i//BATCH_SIZE + 1}: {ex}"
-            )
+    batches = [operations[i:i+BATCH_SIZE] for i in range(0, len(operations), BATCH_SIZE)]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_OPERATIONS)
+
+    async def dispatch(batch_num: int, batch: list) -> Tuple[int, int]:
+        async with semaphore:
+            try:
+                response = await asyncio.to_thread(
+                    ad_group_ad_label_service.mutate_ad_group_ad_labels,
+                    customer_id=customer_id,
+                    operations=batch
+                )
+            except GoogleAdsException as ex:
+                logger.error(
+                    f"[{customer_id}] Failed to remove labels from batch "
+                    f"{batch_num}: {ex}"
+                )
+                return 0, len(batch)
+
+        batch_success = len(response.results)
+        logger.info(
+            f"[{customer_id}] Removed THEMA_ORIGINAL from {batch_success} ads "
+            f"(batch {batch_num}/{len(batches)})"
+        )
+        return batch_success, 0
 
+    results = await asyncio.gather(
+        *(dispatch(batch_num, batch) for batch_num, batch in enumerate(batches, 1))
+    )
+
+    success_count = sum(success for success, _ in results)
+    failure_count = sum(failure for _, failure in results)
     return success_count, failure_count
 
 
@@ -244,13 +273,15 @@ async def process_customer(
     """Process a single customer."""
     logger.info(f"[{customer_id}] Starting cleanup...")
 
-    # Get label IDs
-    label_ids = get_label_ids(client, customer_id)
-    if THEMA_ORIGINAL_LABEL not in label_ids:
+    # Cheap probe first (blocking gRPC calls run in worker threads): no THEMA_ORIGINAL ads means nothing can conflict
+    if not await asyncio.to_thread(has_thema_original_ads, client, customer_id):
+        logger.info(f"[{customer_id}] No ads with THEMA_ORIGINAL label, skipping")
         return {'checked': 0, 'fixed': 0, 'failed': 0}
 
     # Find ads with conflicting labels
-    conflicting_ads = find_ads_with_conflicting_labels(client, customer_id, label_ids)
+    conflicting_ads, thema_original_label_id = await asyncio.to_thread(
+        find_ads_with_conflicting_labels, client, customer_id
+    )
 
     if not conflicting_ads:
         logger.info(f"[{customer_id}] No conflicting labels found ✓")
@@ -264,11 +295,11 @@ async def process_customer(
         )
 
     # Remove THEMA_ORIGINAL labels
-    success, failure = remove_thema_original_labels(
+    success, failure = await remove_thema_original_labels(
         client,
         customer_id,
         conflicting_ads,
-        label_ids[THEMA_ORIGINAL_LABEL],
+        thema_original_label_id,
         dry_run=dry_run
     )
 
@@ -289,7 +320,7 @@ async def main(dry_run: bool = False, limit: int = None):
     logger.info("THEMA_ORIGINAL Label Cleanup Script")
     logger.info("=" * 80)
     logger.info(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
-    logger.info(f"Processing: {len(VALID_CUSTOMERS)} customers")
+    logger.info(f"Processing: {len(VALID_CUSTOMERS)} customers ({MAX_CONCURRENT_CUSTOMERS} concurrently)")
     if limit:
         logger.info(f"Limit: First {limit} customers only")
     logger.info("=" * 80)
@@ -300,19 +331,32 @@ async def main(dry_run: bool = False, limit: int = None):
     # Process customers
     customers_to_process = VALID_CUSTOMERS[:limit] if limit else VALID_CUSTOMERS
 
+    # Size the default executor to the number of blocking calls allowed in flight
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max(MAX_CONCURRENT_CUSTOMERS, MAX_CONCURRENT_OPERATIONS))
+    )
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CUSTOMERS)
+
+    async def process_bounded(customer_id: str) -> Dict[str, int]:
+        async with semaphore:
+            return await process_customer(client, customer_id, dry_run=dry_run)
+
+    results = await asyncio.gather(
+        *(process_bounded(customer_id) for customer_id in customers_to_process),
+        return_exceptions=True
+    )
+
     total_checked = 0
     total_fixed = 0
     total_failed = 0
 
-    for customer_id in customers_to_process:
-        try:
-            result = await process_customer(client, customer_id, dry_run=dry_run)
-            total_checked += result['checked']
-            total_fixed += result['fixed']
-            total_failed += result['failed']
-        except Exception as e:
-            logger.error(f"[{customer_id}] Unexpected error: {e}")
+    for customer_id, result in zip(customers_to_process, results):
+        if isinstance(result, Exception):
+            logger.error(f"[{customer_id}] Unexpected error: {result}")
             continue
+        total_checked += result['checked']
+        total_fixed += result['fixed']
+        total_failed += result['failed']
 
     # Summary
     logger.info("=" * 80)
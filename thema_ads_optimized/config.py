@@ -2,6 +2,7 @@
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -27,6 +28,7 @@ class PerformanceConfig:
     api_retry_delay: float = 2.0  # Increased from 1.0
     api_batch_delay: float = 2.0  # Increased from 0.5 to avoid rate limits
     customer_delay: float = 5.0  # BALANCED: Reduced from 15.0s for faster customer transitions
+    api_operations_per_minute: int = 20000  # Credit budget for the customer limiter (one credit per operation)
     enable_caching: bool = True
 
 
@@ -40,8 +42,14 @@ class AppConfig:
     dry_run: bool = False
 
 
+@lru_cache(maxsize=1)
 def load_config_from_env() -> AppConfig:
-    """Load configuration from environment variables."""
+    """Load configuration from environment variables.
+
+    The result is memoized for the life of the process; call
+    load_config_from_env.cache_clear() after changing the environment.
+    Failed loads (missing variables) are not cached.
+    """
 
     # Validate required env vars
     required_vars = [
@@ -76,6 +84,7 @@ def load_config_from_env() -> AppConfig:
         api_retry_delay=float(os.getenv("API_RETRY_DELAY", "2.0")),
         api_batch_delay=float(os.getenv("API_BATCH_DELAY", "2.0")),
         customer_delay=float(os.getenv("CUSTOMER_DELAY", "30.0")),
+        api_operations_per_minute=int(os.getenv("API_OPERATIONS_PER_MINUTE", "20000")),
         enable_caching=os.getenv("ENABLE_CACHING", "true").lower() == "true"
     )
 
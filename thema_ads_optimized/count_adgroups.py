@@ -42,21 +42,38 @@ query = """
     AND campaign.name LIKE 'HS/%'
 """
 
-response = ga_service.search(customer_id=customer_id, query=query)
-ad_groups = [(str(row.ad_group.id), row.ad_group.name, row.campaign.name) for row in response]
-
-print(f"Total ENABLED ad groups in HS/ campaigns: {len(ad_groups)}")
-
-# Find position of target ad group
+# Stream rows and note the target's position on the way; no ad group list is kept.
+# Only the position relative to the first 50 matters, so stop reading once the
+# target is found and at least 50 rows have been seen.
+FIRST_N = 50
+total_ad_groups = 0
 target_position = None
-for i, (ag_id, ag_name, campaign_name) in enumerate(ad_groups):
-    if ag_id == target_ag_id:
-        target_position = i + 1  # 1-indexed
-        print(f"\nTarget ad group {target_ag_id} found at position {target_position}")
-        print(f"  Name: {ag_name}")
-        print(f"  Campaign: {campaign_name}")
+target_info = None
+stopped_early = False
+stream = ga_service.search_stream(customer_id=customer_id, query=query)
+for batch in stream:
+    for row in batch.results:
+        total_ad_groups += 1
+        if target_position is None and str(row.ad_group.id) == target_ag_id:
+            target_position = total_ad_groups  # 1-indexed
+            target_info = (row.ad_group.name, row.campaign.name)
+        if target_position is not None and total_ad_groups >= FIRST_N:
+            stopped_early = True
+            break
+    if stopped_early:
         break
 
+if stopped_early:
+    print(f"ENABLED ad groups in HS/ campaigns: at least {total_ad_groups} (stopped after finding target)")
+else:
+    print(f"Total ENABLED ad groups in HS/ campaigns: {total_ad_groups}")
+
+if target_position is not None:
+    ag_name, campaign_name = target_info
+    print(f"\nTarget ad group {target_ag_id} found at position {target_position}")
+    print(f"  Name: {ag_name}")
+    print(f"  Campaign: {campaign_name}")
+
 if target_position is None:
     print(f"\nWARNING: Target ad group {target_ag_id} NOT found in ENABLED ad groups in HS/ campaigns!")
     print("\nThis could mean:")
@@ -64,7 +81,7 @@ if target_position is None:
     print("  2. Campaign is not ENABLED")
     print("  3. Campaign name doesn't start with 'HS/'")
 else:
-    if target_position <= 50:
+    if target_position <= FIRST_N:
         print(f"\n✓ Ad group IS within the first 50 (position {target_position})")
     else:
         print(f"\n✗ Ad group is BEYOND the first 50 (position {target_position})")
@@ -1,14 +1,19 @@
 """Google Ads client initialization and management."""
 
 import logging
+from typing import Optional
 from google.ads.googleads.client import GoogleAdsClient
 from config import GoogleAdsConfig
 
 logger = logging.getLogger(__name__)
 
 
-def initialize_client(config: GoogleAdsConfig) -> GoogleAdsClient:
-    """Initialize Google Ads API client from configuration."""
+def initialize_client(config: GoogleAdsConfig, use_proto_plus: Optional[bool] = None) -> GoogleAdsClient:
+    """Initialize Google Ads API client from configuration.
+
+    Pass use_proto_plus=False for high-volume read paths to get raw protobuf
+    messages instead of the slower proto-plus wrappers.
+    """
 
     client_config = {
         "developer_token": config.developer_token,
@@ -16,7 +21,7 @@ def initialize_client(config: GoogleAdsConfig) -> GoogleAdsClient:
         "client_id": config.client_id,
         "client_secret": config.client_secret,
         "login_customer_id": config.login_customer_id,
-        "use_proto_plus": config.use_proto_plus,
+        "use_proto_plus": config.use_proto_plus if use_proto_plus is None else use_proto_plus,
     }
 
     try:
@@ -10,11 +10,16 @@ This script processes Google Ads themed campaigns with the following optimizatio
 """
 
 import asyncio
+import concurrent.futures
+import itertools
+import json
 import logging
 import sys
 from pathlib import Path
-from typing import List, Dict
-from collections import defaultdict
+from typing import List, Dict, NamedTuple, Optional
+from dataclasses import asdict, replace
+from functools import lru_cache
+from operator import attrgetter
 import time
 
 # Add parent directory to path for imports
@@ -24,11 +29,12 @@ from config import load_config_from_env
 from google_ads_client import initialize_client
 from models import AdGroupInput, ProcessingResult
 from processors.data_loader import load_data
-from operations.prefetch import prefetch_customer_data
-from operations.labels import ensure_labels_exist, label_ads_batch, label_ad_groups_batch
+from operations.prefetch import prefetch_customer_data, PREFETCH_QUERIES
+from operations.labels import ensure_labels_exist, label_ads_and_ad_groups_batch
 from operations.ads import create_rsa_batch, build_ad_data
 from templates.generators import generate_themed_content
-from themes import get_theme_label, get_all_theme_labels
+from themes import get_theme_label, get_all_theme_labels, ALL_THEME_LABELS_SET
+from utils.rate_limiter import CreditSemaphore
 
 
 # Configure logging
@@ -43,12 +49,79 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Fixed credit cost per customer for the prefetch and label lookups, on top of one per ad group
+CUSTOMER_OVERHEAD_CREDITS = 10
+
+
+@lru_cache(maxsize=4096)
+def themed_content_cached(theme_name: str, base_headlines: tuple, base_description: str) -> tuple:
+    """generate_themed_content memoized on its inputs; templated ad groups share base text.
+
+    The returned lists are shared between callers and must not be mutated.
+    """
+    return generate_themed_content(theme_name, list(base_headlines), base_description)
+
+
+# ALL ad groups for a customer (no filter); one unfiltered query is faster than
+# multiple filtered ones
+AD_GROUP_NAMES_QUERY = """
+    SELECT ad_group.id, ad_group.name
+    FROM ad_group
+"""
+
+# Ad group name -> ID maps, shared by every processor in the process (the backend
+# runs many jobs per process). Entries expire so new or renamed ad groups show up.
+AD_GROUP_ID_CACHE_TTL = 900
+_ad_group_id_cache: Dict[str, tuple] = {}  # customer_id -> (fetched_at, {ad_group_name: ad_group_id})
+
+
+def cached_ad_group_ids(customer_id: str) -> Optional[Dict[str, str]]:
+    """Return the customer's cached name -> ID map, or None if missing or expired."""
+    entry = _ad_group_id_cache.get(customer_id)
+    if entry and time.monotonic() - entry[0] < AD_GROUP_ID_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+class BuiltOps(NamedTuple):
+    """Operations built in memory for one ad group."""
+    ad_data: dict
+    ad_labels: tuple  # (ad_resource, label_resource) pairs; filled after ad creation, so empty here
+    ag_labels: tuple  # (ad_group_resource, label_resource) pairs
+    old_ad: str
+
+
+def needs_name_lookup(inp: AdGroupInput) -> bool:
+    """True when the ad group ID must be checked against the ad group name.
+
+    A plain digit ID proves nothing: the backend turns Excel damage such as
+    '1.76256E+11' into '176256000000' before the job is stored, so any input
+    with a name is resolved by name.
+    """
+    return bool(inp.ad_group_name)
+
+
 class ThemaAdsProcessor:
     """High-performance processor for themed ad campaigns."""
 
-    def __init__(self, config, batch_size: int = 5000, skip_sd_done_check: bool = False):
+    def __init__(
+        self,
+        config,
+        batch_size: int = 5000,
+        skip_sd_done_check: bool = False,
+        partial_results_file: Optional[Path] = None
+    ):
         self.config = config
+        # process_all empties this file, then appends each customer's results as they finish (JSONL), if set
+        self.partial_results_file = partial_results_file
         self.client = initialize_client(config.google_ads)
+        # Raw-protobuf client for the read-heavy GAQL paths (faster row parsing);
+        # mutations keep using the proto-plus client above
+        self.read_client = initialize_client(config.google_ads, use_proto_plus=False)
+        # Service client shared by all customers and executor threads
+        self._ga_service = self.read_client.get_service("GoogleAdsService")
+        # (customer_id, ad_group_id) -> ad group resource name, reused across runs
+        self._resource_cache: Dict[tuple, str] = {}
         self.theme = "singles_day"  # Default theme (legacy)
         # Get all theme labels dynamically + standard labels
         theme_labels = get_all_theme_labels()
@@ -57,6 +130,25 @@ class ThemaAdsProcessor:
         self.label_names = theme_labels + done_labels + ["THEMA_AD", "THEMA_ORIGINAL"]
         self.batch_size = batch_size
         self.skip_sd_done_check = skip_sd_done_check
+        # Checked once so per-ad-group log calls cost nothing when their level is off
+        self._debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        self._info_enabled = logger.isEnabledFor(logging.INFO)
+        # Blocking Google Ads searches (prefetch queries, name lookups) and result-file
+        # writes run here, off the shared default executor. Each active customer may
+        # also have the next customer's look-ahead prefetch in flight, and every
+        # prefetch runs PREFETCH_QUERIES queries at once
+        self._io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.performance.max_concurrent_customers * 2 * PREFETCH_QUERIES,
+            thread_name_prefix="gads-io"
+        )
+        # Customers whose name -> ID map was fetched by this processor (not just reused
+        # from the process-wide cache), so a name miss is real rather than stale
+        self._refreshed_ad_group_ids = set()
+        # Look-ahead prefetch: customer_id -> (next customer_id, inputs), in-flight
+        # prefetch tasks, and customers whose processing has already begun
+        self._next_customer: Dict[str, tuple] = {}
+        self._prefetch_cache: Dict[str, asyncio.Task] = {}
+        self._claimed = set()
         logger.info(f"Initialized ThemaAdsProcessor with batch_size={batch_size}, skip_sd_done_check={skip_sd_done_check}")
         logger.info(f"Theme labels: {theme_labels}")
         logger.info(f"DONE labels: {done_labels}")
@@ -68,36 +160,57 @@ class ThemaAdsProcessor:
         start_time = time.time()
 
         # Group by customer_id for optimal batching
-        by_customer = defaultdict(list)
-        for inp in inputs:
-            by_customer[inp.customer_id].append(inp)
+        # (stable sort keeps each customer's inputs in their original order)
+        customer_key = attrgetter('customer_id')
+        by_customer = {
+            cid: list(group)
+            for cid, group in itertools.groupby(sorted(inputs, key=customer_key), key=customer_key)
+        }
 
         logger.info(f"Processing {len(by_customer)} customers")
 
-        # Process customers in parallel with semaphore
+        # Resolve ad group names for all customers up front
+        await self._prefetch_all_name_lookups(inputs)
+
+        # File writes run on the I/O pool, never on the event loop; they are awaited
+        # one at a time, so lines from different customers never interleave
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io_executor, self._reset_partial)
+
+        # Process customers in parallel: the semaphore caps concurrency, the credit
+        # limiter paces API operations per minute instead of sleeping between customers
         semaphore = asyncio.Semaphore(self.config.performance.max_concurrent_customers)
+        limiter = CreditSemaphore(capacity=self.config.performance.api_operations_per_minute, refund_time=60.0)
 
         async def process_with_limit(customer_id, customer_inputs):
             async with semaphore:
-                result = await self.process_customer(customer_id, customer_inputs)
-                # Add delay between customers to avoid rate limits
-                await asyncio.sleep(self.config.performance.customer_delay)
-                return result
+                return await limiter.transact(
+                    self.process_customer(customer_id, customer_inputs),
+                    credits=len(customer_inputs) + CUSTOMER_OVERHEAD_CREDITS
+                )
 
+        # Largest customers first (the semaphore admits in order), so big jobs
+        # don't start last and stretch the tail while other slots sit idle
+        ordered = sorted(by_customer.items(), key=lambda kv: len(kv[1]), reverse=True)
+        self._next_customer = {
+            cid: ordered[i + 1] for i, (cid, _) in enumerate(ordered[:-1])
+        }
+        # Tasks are created up front so they queue on the semaphore in this order
         tasks = [
-            process_with_limit(cid, inputs_list)
-            for cid, inputs_list in by_customer.items()
+            asyncio.create_task(process_with_limit(cid, inputs_list))
+            for cid, inputs_list in ordered
         ]
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Flatten results
+        # Collect each customer's results as soon as it finishes
         all_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Customer processing failed: {result}")
-            else:
-                all_results.extend(result)
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                logger.error(f"Customer processing failed: {e}")
+                continue
+            all_results.extend(result)
+            await loop.run_in_executor(self._io_executor, self._flush_partial, result)
 
         elapsed = time.time() - start_time
         success_count = sum(1 for r in all_results if r.success)
@@ -109,6 +222,77 @@ class ThemaAdsProcessor:
 
         return all_results
 
+    def _reset_partial(self):
+        """Empty partial_results_file so it holds only this run's results (blocking)."""
+        if not self.partial_results_file:
+            return
+        try:
+            self.partial_results_file.write_text("")
+        except OSError as e:
+            logger.warning(f"Could not reset partial results file {self.partial_results_file}: {e}")
+
+    def _flush_partial(self, results: List[ProcessingResult]):
+        """Append one customer's results to partial_results_file so a crash mid-run loses no finished work (blocking)."""
+        if not self.partial_results_file or not results:
+            return
+        try:
+            with open(self.partial_results_file, 'a') as f:
+                for r in results:
+                    f.write(json.dumps(asdict(r)) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write partial results to {self.partial_results_file}: {e}")
+
+    async def close(self):
+        """Shut down the I/O thread pool; call once processing is finished."""
+        await asyncio.to_thread(self._io_executor.shutdown, True)
+
+    def _fetch_ad_group_ids(self, customer_id: str) -> Dict[str, str]:
+        """Fetch ALL ad group name -> ID mappings for a customer in one query (blocking)."""
+        ga_service = self._ga_service
+
+        try:
+            # Build the map batch by batch from the stream
+            name_to_id = {}
+            stream = ga_service.search_stream(customer_id=customer_id, query=AD_GROUP_NAMES_QUERY)
+            for batch in stream:
+                for row in batch.results:
+                    name_to_id[row.ad_group.name] = str(row.ad_group.id)
+            logger.info(f"Pre-fetched {len(name_to_id)} ad group IDs for customer {customer_id}")
+            return name_to_id
+        except Exception as e:
+            logger.error(f"Failed to pre-fetch ad group IDs: {e}")
+            return {}
+
+    def _store_ad_group_ids(self, customer_id: str, name_to_id: Dict[str, str]):
+        """Record a freshly fetched map; empty maps (failed fetches) are not cached."""
+        if name_to_id:
+            _ad_group_id_cache[customer_id] = (time.monotonic(), name_to_id)
+        self._refreshed_ad_group_ids.add(customer_id)
+
+    async def _prefetch_all_name_lookups(self, inputs: List[AdGroupInput]):
+        """Resolve name -> ID maps for every customer that needs them, before fan-out.
+
+        GAQL queries are scoped to a single customer, so this is still one query per
+        customer, but they all run up front on the I/O pool instead of inside each
+        customer's slot.
+        """
+        customer_ids = {
+            inp.customer_id for inp in inputs
+            if needs_name_lookup(inp) and cached_ad_group_ids(inp.customer_id) is None
+        }
+        if not customer_ids:
+            return
+
+        loop = asyncio.get_running_loop()
+        customer_ids = list(customer_ids)
+        maps = await asyncio.gather(*(
+            loop.run_in_executor(self._io_executor, self._fetch_ad_group_ids, cid)
+            for cid in customer_ids
+        ))
+        for cid, name_to_id in zip(customer_ids, maps):
+            self._store_ad_group_ids(cid, name_to_id)
+        logger.info(f"Pre-fetched ad group IDs for {len(customer_ids)} customers")
+
     async def _resolve_ad_group_ids(
         self,
         customer_id: str,
@@ -117,70 +301,92 @@ class ThemaAdsProcessor:
         """Resolve ad_group_id from ad_group_name when name is provided.
         Excel scientific notation corrupts IDs, so we look up correct IDs by name.
 
-        Optimized: Pre-fetches ALL ad group IDs in a single query for the entire customer,
-        then uses dictionary lookup instead of repeated queries.
+        Optimized: uses the name -> ID map pre-fetched by _prefetch_all_name_lookups
+        (or cached by an earlier job in this process), falling back to a single
+        query for the whole customer when it is missing or stale.
         """
-        # Separate inputs that need lookup vs those that don't
-        inputs_needing_lookup = [inp for inp in inputs if inp.ad_group_name]
-        inputs_ready = [inp for inp in inputs if not inp.ad_group_name]
-
-        if not inputs_needing_lookup:
+        # Inputs without a name are used as-is; the rest are checked against the name -> ID map
+        lookup_count = sum(1 for inp in inputs if needs_name_lookup(inp))
+        if not lookup_count:
             return inputs  # No lookups needed
 
-        # Optimization: Pre-fetch all ad group ID mappings for this customer
-        async def _prefetch_all_ad_groups():
-            """Pre-fetch ALL ad group IDs for this customer in one query."""
-            def _fetch():
-                ga_service = self.client.get_service("GoogleAdsService")
-
-                # Query ALL ad groups for this customer (no filter)
-                # This is faster than multiple filtered queries
-                query = """
-                    SELECT ad_group.id, ad_group.name
-                    FROM ad_group
-                """
-
-                try:
-                    response = ga_service.search(customer_id=customer_id, query=query)
-                    name_to_id = {row.ad_group.name: str(row.ad_group.id) for row in response}
-                    logger.info(f"Pre-fetched {len(name_to_id)} ad group IDs for customer {customer_id}")
-                    return name_to_id
-                except Exception as e:
-                    logger.error(f"Failed to pre-fetch ad group IDs: {e}")
-                    return {}
-
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, _fetch)
-
-        # Pre-fetch all ad group mappings
-        name_to_id = await _prefetch_all_ad_groups()
+        name_to_id = cached_ad_group_ids(customer_id)
+        # A cached map from an earlier job may predate new ad groups; refetch once on a miss
+        stale = (
+            name_to_id is not None
+            and customer_id not in self._refreshed_ad_group_ids
+            and any(inp.ad_group_name not in name_to_id for inp in inputs if needs_name_lookup(inp))
+        )
+        if name_to_id is None or stale:
+            loop = asyncio.get_running_loop()
+            name_to_id = await loop.run_in_executor(self._io_executor, self._fetch_ad_group_ids, customer_id)
+            self._store_ad_group_ids(customer_id, name_to_id)
 
         if not name_to_id:
             logger.warning(f"No ad groups found for customer {customer_id}")
-            return inputs_ready + inputs_needing_lookup
+            return inputs
 
-        # Fast dictionary lookup for all inputs
+        # Fast dictionary lookup, keeping the caller's input order
         corrected_inputs = []
-        for inp in inputs_needing_lookup:
-            if inp.ad_group_name in name_to_id:
-                # Create new input with correct ID
-                corrected_inp = AdGroupInput(
-                    customer_id=inp.customer_id,
-                    campaign_name=inp.campaign_name,
-                    campaign_id=inp.campaign_id,
-                    ad_group_id=name_to_id[inp.ad_group_name],
-                    ad_group_name=inp.ad_group_name,
-                    theme_name=inp.theme_name
-                )
-                corrected_inputs.append(corrected_inp)
+        resolved = 0
+        for inp in inputs:
+            if not needs_name_lookup(inp):
+                corrected_inputs.append(inp)
+            elif inp.ad_group_name in name_to_id:
+                correct_id = name_to_id[inp.ad_group_name]
+                if correct_id != inp.ad_group_id:
+                    # Create new input with correct ID
+                    inp = replace(inp, ad_group_id=correct_id)
+                corrected_inputs.append(inp)
+                resolved += 1
             else:
                 logger.warning(f"Could not find ad group '{inp.ad_group_name}' for customer {customer_id}")
                 corrected_inputs.append(inp)  # Use original (will likely fail)
 
-        logger.info(f"Resolved {len(corrected_inputs)}/{len(inputs_needing_lookup)} ad group IDs from names")
+        logger.info(f"Resolved {resolved}/{lookup_count} ad group IDs from names")
+
+        return corrected_inputs
+
+    async def _prepare_customer(self, customer_id: str, inputs: List[AdGroupInput]) -> tuple:
+        """Resolve IDs, build ad group resource names and prefetch a customer's data.
 
-        # Combine corrected and ready inputs
-        return corrected_inputs + inputs_ready
+        Returns (inputs_with_correct_ids, ad_group_resources, cached_data), with the
+        first two aligned index by index.
+        """
+        # Resolve ad group names to correct IDs (Excel scientific notation corrupts IDs)
+        inputs_with_correct_ids = await self._resolve_ad_group_ids(customer_id, inputs)
+
+        # Build ad group resource names (same format as AdGroupService.ad_group_path)
+        template = f"customers/{customer_id}/adGroups/{{}}"
+        resource_cache = self._resource_cache
+        ad_group_resources = []
+        for inp in inputs_with_correct_ids:
+            key = (customer_id, inp.ad_group_id)
+            resource = resource_cache.get(key)
+            if resource is None:
+                resource = resource_cache[key] = template.format(inp.ad_group_id)
+            ad_group_resources.append(resource)
+
+        # Step 1: Prefetch all data (2-3 API calls)
+        cached_data = await prefetch_customer_data(
+            self.client,
+            customer_id,
+            ad_group_resources,
+            batch_size=self.batch_size,
+            ga_service=self._ga_service,
+            executor=self._io_executor
+        )
+        return inputs_with_correct_ids, ad_group_resources, cached_data
+
+    def _prefetch_next(self, customer_id: str):
+        """Start prefetching the customer queued after customer_id, unless it has already started."""
+        queued = self._next_customer.pop(customer_id, None)
+        if queued is None:
+            return
+        next_id, next_inputs = queued
+        if next_id in self._claimed or next_id in self._prefetch_cache:
+            return
+        self._prefetch_cache[next_id] = asyncio.create_task(self._prepare_customer(next_id, next_inputs))
 
     async def process_customer(
         self,
@@ -190,25 +396,26 @@ class ThemaAdsProcessor:
         """Process all ad groups for a single customer."""
 
         logger.info(f"Processing customer {customer_id}: {len(inputs)} ad groups")
+        self._claimed.add(customer_id)
 
         try:
-            # Resolve ad group names to correct IDs (Excel scientific notation corrupts IDs)
-            inputs_with_correct_ids = await self._resolve_ad_group_ids(customer_id, inputs)
-
-            # Build ad group resource names
-            ag_service = self.client.get_service("AdGroupService")
-            ad_group_resources = [
-                ag_service.ad_group_path(customer_id, inp.ad_group_id)
-                for inp in inputs_with_correct_ids
-            ]
+            # Use the prefetch started while the previous customer was mutating, if any
+            pending = self._prefetch_cache.pop(customer_id, None)
+            if pending is not None:
+                inputs_with_correct_ids, ad_group_resources, cached_data = await pending
+            else:
+                inputs_with_correct_ids, ad_group_resources, cached_data = await self._prepare_customer(
+                    customer_id, inputs
+                )
 
-            # Step 1: Prefetch all data (2-3 API calls)
-            cached_data = await prefetch_customer_data(
-                self.client,
-                customer_id,
-                ad_group_resources,
-                batch_size=self.batch_size
-            )
+            # Overlap the next customer's prefetch with this customer's mutations
+            self._prefetch_next(customer_id)
+
+            # Theme label per theme name, looked up once for this customer's inputs
+            theme_labels = {
+                theme_name: get_theme_label(theme_name)
+                for theme_name in {inp.theme_name for inp in inputs_with_correct_ids}
+            }
 
             # Step 2: Ensure all labels exist (1 API call)
             labels = await ensure_labels_exist(
@@ -221,7 +428,7 @@ class ThemaAdsProcessor:
             # Step 2.5: Auto-remove old theme ads when switching themes
             await self._remove_conflicting_theme_ads(
                 customer_id,
-                inputs,
+                inputs_with_correct_ids,
                 ad_group_resources,
                 cached_data,
                 labels
@@ -237,15 +444,28 @@ class ThemaAdsProcessor:
             processed_inputs = []
             failed_inputs = []  # Track inputs that failed pre-checks
 
-            for inp, ag_resource in zip(inputs, ad_group_resources):
-                # Skip ad groups that already have this theme's DONE label (unless this is a repair job)
-                if not self.skip_sd_done_check and cached_data.ad_group_labels:
-                    theme_label = get_theme_label(inp.theme_name)
-                    done_label_name = f"{theme_label}_DONE"
-                    if done_label_name in cached_data.ad_group_labels.get(ag_resource, set()):
-                        logger.info(f"Skipping ad group {inp.ad_group_id} - already has {done_label_name} label")
-                        skipped_ags.append(inp)
-                        continue
+            # Per theme, the ad groups that already have its DONE label (prefetched, and
+            # kept current by the cleanup step above). Empty for repair jobs, which
+            # reprocess everything.
+            done_ag_resources = cached_data.done_ag_resources or {}
+            if self.skip_sd_done_check or not done_ag_resources:
+                done_by_theme = {}
+            else:
+                done_by_theme = {
+                    theme_name: done_ag_resources.get(f"{theme_label}_DONE", frozenset())
+                    for theme_name, theme_label in theme_labels.items()
+                }
+
+            for inp, ag_resource in zip(inputs_with_correct_ids, ad_group_resources):
+                # Skip ad groups that already have this theme's DONE label
+                if done_by_theme and ag_resource in done_by_theme[inp.theme_name]:
+                    if self._info_enabled:
+                        logger.info(
+                            "Skipping ad group %s - already has %s_DONE label",
+                            inp.ad_group_id, theme_labels[inp.theme_name]
+                        )
+                    skipped_ags.append(inp)
+                    continue
 
                 result = self._build_operations_for_ad_group(
                     inp,
@@ -257,11 +477,11 @@ class ThemaAdsProcessor:
                 if result:
                     # Track inputs that successfully built operations
                     processed_inputs.append(inp)
-                    ad_operations.append(result["ad_data"])
-                    label_operations_ads.extend(result["ad_labels"])
-                    label_operations_ad_groups.extend(result["ag_labels"])
-                    if result["old_ad"]:
-                        old_ads_to_label.append(result["old_ad"])
+                    ad_operations.append(result.ad_data)
+                    label_operations_ads.extend(result.ad_labels)
+                    label_operations_ad_groups.extend(result.ag_labels)
+                    if result.old_ad:
+                        old_ads_to_label.append(result.old_ad)
                 else:
                     # Track inputs that failed pre-checks (no existing ad or no final URL)
                     failed_inputs.append(inp)
@@ -303,44 +523,37 @@ class ThemaAdsProcessor:
             for failure in creation_failures:
                 failure_map[failure["ad_group_resource"]] = failure["error"]
 
-            # Label old ads
-            if old_ads_to_label:
-                await label_ads_batch(
-                    self.client,
-                    customer_id,
-                    [(ad, labels["THEMA_ORIGINAL"]) for ad in old_ads_to_label]
-                )
+            # Label old ads, new ads and (only successful) ad groups in one mutate call
+            ad_label_ops = [(ad, labels["THEMA_ORIGINAL"]) for ad in old_ads_to_label]
 
             # Label new ads with their respective theme labels
-            if new_ad_resources:
-                # Build label operations with correct theme labels
-                new_label_ops = []
-                for i, ad_res in enumerate(new_ad_resources):
-                    # Get the corresponding input to know which theme label to use
-                    if i < len(processed_inputs):
-                        inp = processed_inputs[i]
-                        theme_label_name = get_theme_label(inp.theme_name)
-                        if theme_label_name in labels:
-                            new_label_ops.append((ad_res, labels[theme_label_name]))
-                        # new_label_ops.append((ad_res, labels["THEMA_AD"]))  # Disabled to reduce API operations
-
-                await label_ads_batch(self.client, customer_id, new_label_ops)
-
-            # Label ad groups (only successful ones)
-            if label_operations_ad_groups and new_ad_resources:
-                await label_ad_groups_batch(
+            for i, ad_res in enumerate(new_ad_resources):
+                # Get the corresponding input to know which theme label to use
+                if i < len(processed_inputs):
+                    inp = processed_inputs[i]
+                    theme_label_name = theme_labels[inp.theme_name]
+                    if theme_label_name in labels:
+                        ad_label_ops.append((ad_res, labels[theme_label_name]))
+                    # ad_label_ops.append((ad_res, labels["THEMA_AD"]))  # Disabled to reduce API operations
+
+            ad_group_label_ops = label_operations_ad_groups if new_ad_resources else []
+
+            if ad_label_ops or ad_group_label_ops:
+                await label_ads_and_ad_groups_batch(
                     self.client,
                     customer_id,
-                    label_operations_ad_groups
+                    ad_label_ops,
+                    ad_group_label_ops
                 )
 
             # Build results
             results = []
 
-            # Add results for processed ad groups (match with ad_operations)
-            for i, inp in enumerate(processed_inputs):
-                ad_group_res = ad_operations[i]["ad_group_resource"]
-
+            # Add results for processed ad groups (match with ad_operations);
+            # new_ad is None once new_ad_resources runs out
+            processed_resources = [op["ad_group_resource"] for op in ad_operations]
+            new_ads = itertools.chain(new_ad_resources, itertools.repeat(None))
+            for inp, ad_group_res, new_ad in zip(processed_inputs, processed_resources, new_ads):
                 # Check if this ad group had a creation failure
                 if ad_group_res in failure_map:
                     results.append(
@@ -352,14 +565,14 @@ class ThemaAdsProcessor:
                             operations_count=0
                         )
                     )
-                elif i < len(new_ad_resources):
+                elif new_ad is not None:
                     # Successfully created
                     results.append(
                         ProcessingResult(
                             customer_id=customer_id,
                             ad_group_id=inp.ad_group_id,
                             success=True,
-                            new_ad_resource=new_ad_resources[i],
+                            new_ad_resource=new_ad,
                             operations_count=1
                         )
                     )
@@ -377,7 +590,7 @@ class ThemaAdsProcessor:
 
             # Add results for skipped ad groups (mark as success since they were already processed)
             for inp in skipped_ags:
-                theme_label = get_theme_label(inp.theme_name)
+                theme_label = theme_labels[inp.theme_name]
                 done_label_name = f"{theme_label}_DONE"
                 results.append(
                     ProcessingResult(
@@ -440,75 +653,29 @@ class ThemaAdsProcessor:
             theme_label = get_theme_label(inp.theme_name)
             ag_target_theme[ag_resource] = theme_label
 
-        # Get all theme labels for filtering
-        from themes import get_all_theme_labels
-        all_theme_labels = set(get_all_theme_labels())
+        # Reverse map for theme labels only: label resource -> theme label name
+        resource_to_theme_label = {
+            res: name for name, res in labels.items() if name in ALL_THEME_LABELS_SET
+        }
 
         logger.info("Checking RSA counts and theme ads for cleanup...")
 
-        # Query all RSAs with labels and status
-        def _get_rsa_details():
-            """Get RSA details including status and labels."""
-            ga_service = self.client.get_service("GoogleAdsService")
-            ag_rsa_details = {}  # ag_resource -> list of {ad_resource, status, labels}
-
-            # Query RSAs in batches
-            for i in range(0, len(ad_group_resources), self.batch_size):
-                batch = ad_group_resources[i:i + self.batch_size]
-                resources_str = ", ".join(f"'{r}'" for r in batch)
-
-                query = f"""
-                    SELECT
-                        ad_group_ad.ad_group,
-                        ad_group_ad.resource_name,
-                        ad_group_ad.status,
-                        ad_group_ad_label.label
-                    FROM ad_group_ad
-                    LEFT JOIN ad_group_ad_label ON ad_group_ad.resource_name = ad_group_ad_label.ad_group_ad
-                    WHERE ad_group_ad.ad_group IN ({resources_str})
-                        AND ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
-                        AND ad_group_ad.status != REMOVED
-                """
-
-                try:
-                    response = ga_service.search(customer_id=customer_id, query=query)
-
-                    for row in response:
-                        ag_res = row.ad_group_ad.ad_group
-                        ad_res = row.ad_group_ad.resource_name
-                        status = str(row.ad_group_ad.status)
-
-                        # Get label if present
-                        label_res = None
-                        if hasattr(row, 'ad_group_ad_label') and row.ad_group_ad_label:
-                            label_res = row.ad_group_ad_label.label
-
-                        # Find if this ad has a theme label
-                        theme_label_name = None
-                        if label_res and label_res in labels.values():
-                            # Reverse lookup label name
-                            for label_name, label_resource in labels.items():
-                                if label_resource == label_res and label_name in all_theme_labels:
-                                    theme_label_name = label_name
-                                    break
-
-                        if ag_res not in ag_rsa_details:
-                            ag_rsa_details[ag_res] = []
-
-                        ag_rsa_details[ag_res].append({
-                            'ad_resource': ad_res,
-                            'status': status,
-                            'theme_label': theme_label_name
-                        })
-
-                except Exception as e:
-                    logger.warning(f"Failed to get RSA details: {e}")
-
-            return ag_rsa_details
-
-        # Get RSA details
-        loop = asyncio.get_event_loop()
-        ag_rsa_details = await loop.run_in_executor(None, _get_rsa_details)
+        # RSA status and labels come from the prefetch query, so no extra round-trip here
+        ag_rsa_details = {}  # ag_resource -> list of {ad_resource, status, theme_label}
+        for ag_res, rsas in (cached_data.rsa_details or {}).items():
+            ag_rsa_details[ag_res] = [
+                {
+                    'ad_resource': rsa['ad_resource'],
+                    'status': rsa['status'],
+                    # Find if this ad has a theme label
+                    'theme_label': next(
+                        (resource_to_theme_label[res] for res in rsa['label_resources']
+                         if res in resource_to_theme_label),
+                        None
+                    )
+                }
+                for rsa in rsas
+            ]
 
         # Process each ad group
         ads_to_remove = []
@@ -580,6 +747,8 @@ class ThemaAdsProcessor:
                         # Update cached data
                         if ag_resource in cached_data.ad_group_labels:
                             cached_data.ad_group_labels[ag_resource].discard(done_label)
+                        if done_label in cached_data.done_ag_resources:
+                            cached_data.done_ag_resources[done_label].discard(ag_resource)
 
                 except Exception as e:
                     logger.warning(f"  Failed to remove {done_label} label: {e}")
@@ -590,18 +759,20 @@ class ThemaAdsProcessor:
         ad_group_resource: str,
         cached_data,
         labels: Dict[str, str]
-    ) -> dict:
+    ) -> Optional[BuiltOps]:
         """Build all operations for a single ad group."""
 
         # Get existing ad from cache
         existing_ad = cached_data.existing_ads.get(ad_group_resource)
 
         if not existing_ad:
-            logger.debug(f"No existing ad for ad group {inp.ad_group_id}")
+            if self._debug_enabled:
+                logger.debug("No existing ad for ad group %s", inp.ad_group_id)
             return None
 
         if not existing_ad.final_urls:
-            logger.debug(f"No final URL for ad group {inp.ad_group_id}")
+            if self._debug_enabled:
+                logger.debug("No final URL for ad group %s", inp.ad_group_id)
             return None
 
         final_url = existing_ad.final_urls[0]
@@ -609,9 +780,9 @@ class ThemaAdsProcessor:
         base_desc_1 = existing_ad.descriptions[0] if existing_ad.descriptions else ""
 
         # Generate themed content using the input's theme
-        extra_headlines, extra_descriptions, path1 = generate_themed_content(
+        extra_headlines, extra_descriptions, path1 = themed_content_cached(
             inp.theme_name,
-            base_headlines_3,
+            tuple(base_headlines_3),
             base_desc_1
         )
 
@@ -627,23 +798,17 @@ class ThemaAdsProcessor:
             path2=existing_ad.path2 or existing_ad.path1 or ""
         )
 
-        # Build label operations
-        ad_labels = []  # Will be filled after ad creation
-
         # Get theme-specific DONE label
         theme_label = get_theme_label(inp.theme_name)
         done_label_name = f"{theme_label}_DONE"
 
-        ag_labels = [
-            (ad_group_resource, labels[done_label_name])
-        ]
-
-        return {
-            "ad_data": ad_data,
-            "ad_labels": ad_labels,
-            "ag_labels": ag_labels,
-            "old_ad": existing_ad.resource_name
-        }
+        # Ad labels are filled after ad creation, so none are built here
+        return BuiltOps(
+            ad_data=ad_data,
+            ad_labels=(),
+            ag_labels=((ad_group_resource, labels[done_label_name]),),
+            old_ad=existing_ad.resource_name
+        )
 
 
 async def main():
@@ -663,8 +828,13 @@ async def main():
             return
 
         # Process
-        processor = ThemaAdsProcessor(config)
-        results = await processor.process_all(inputs)
+        # One results file per run, so an earlier run's output is never mixed in
+        results_file = Path(f"thema_ads_results_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+        processor = ThemaAdsProcessor(config, partial_results_file=results_file)
+        try:
+            results = await processor.process_all(inputs)
+        finally:
+            await processor.close()
 
         # Summary
         success_count = sum(1 for r in results if r.success)
@@ -675,10 +845,15 @@ async def main():
         logger.info("=" * 60)
 
         if failed_count > 0:
-            logger.warning("Failed ad groups:")
-            for r in results:
-                if not r.success:
-                    logger.warning(f"  - {r.customer_id} / {r.ad_group_id}: {r.error}")
+            # One write for all failures instead of a log call per ad group
+            failures_file = Path('thema_ads_failures.jsonl')
+            failures = [
+                {"customer_id": r.customer_id, "ad_group_id": r.ad_group_id, "error": r.error}
+                for r in results if not r.success
+            ]
+            with open(failures_file, 'w') as f:
+                f.write("".join(json.dumps(failure) + "\n" for failure in failures))
+            logger.warning(f"{failed_count} failed ad groups written to {failures_file}")
 
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AdGroupInput:
     """Input data for processing an ad group."""
     customer_id: str
@@ -15,7 +15,7 @@ class AdGroupInput:
     theme_name: str = "singles_day"  # Theme to apply to this ad group
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExistingAd:
     """Existing RSA data."""
     resource_name: str
@@ -27,16 +27,18 @@ class ExistingAd:
     path2: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CachedData:
     """Prefetched data for a customer."""
     labels: dict  # label_name -> resource_name
     existing_ads: dict  # ad_group_resource -> ExistingAd
     campaigns: dict  # campaign_name -> resource_name
     ad_group_labels: dict = None  # ad_group_resource -> has_SD_DONE_label (bool)
+    done_ag_resources: dict = None  # DONE label name -> set of ad_group_resources that have it
+    rsa_details: dict = None  # ad_group_resource -> list of {ad_resource, status, label_resources}
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProcessingResult:
     """Result of processing an ad group."""
     customer_id: str
@@ -39,12 +39,22 @@ async def create_rsa_batch(
         }
     """
 
-    def _create_chunk_with_retry(service, chunk, chunk_size):
-        """Create a chunk with automatic size reduction on REQUEST_TOO_LARGE."""
+    def _create_chunk_with_retry(service, chunk, chunk_size, op_pool):
+        """Create a chunk with automatic size reduction on REQUEST_TOO_LARGE.
+
+        Operation messages are borrowed from op_pool and cleared for reuse, so one
+        customer's chunks share at most BATCH_LIMIT operation objects.
+        """
         operations = []
 
-        for ad_data in chunk:
-            op = client.get_type("AdGroupAdOperation")
+        for i, ad_data in enumerate(chunk):
+            if i < len(op_pool):
+                op = op_pool[i]
+                # Proto-plus wraps the protobuf in _pb; raw protobuf messages clear directly
+                getattr(op, "_pb", op).Clear()
+            else:
+                op = client.get_type("AdGroupAdOperation")
+                op_pool.append(op)
             aga = op.create
 
             aga.ad_group = ad_data["ad_group_resource"]
@@ -101,7 +111,7 @@ async def create_rsa_batch(
                 # Split into smaller sub-chunks
                 for sub_start in range(0, len(chunk), new_chunk_size):
                     sub_chunk = chunk[sub_start:sub_start + new_chunk_size]
-                    result = _create_chunk_with_retry(service, sub_chunk, new_chunk_size)
+                    result = _create_chunk_with_retry(service, sub_chunk, new_chunk_size, op_pool)
                     all_resources.extend(result["resources"])
                     all_failures.extend(result["failures"])
 
@@ -123,6 +133,7 @@ async def create_rsa_batch(
         service = client.get_service("AdGroupAdService")
         all_resource_names = []
         all_failures = []
+        op_pool = []  # Reusable AdGroupAdOperation messages, at most one chunk's worth
 
         # Reduced batch size to avoid overwhelming Google's ad policy crawler
         # Google Ads API limit: 10,000 operations per request
@@ -140,7 +151,7 @@ async def create_rsa_batch(
             if chunk_num > 1:
                 _rate_limiter.wait()
 
-            result = _create_chunk_with_retry(service, chunk, BATCH_LIMIT)
+            result = _create_chunk_with_retry(service, chunk, BATCH_LIMIT, op_pool)
 
             all_resource_names.extend(result["resources"])
             all_failures.extend(result["failures"])
@@ -170,6 +170,80 @@ async def label_ad_groups_batch(
     return await loop.run_in_executor(None, _label)
 
 
+@async_retry(max_attempts=3, delay=1.0)
+async def label_ads_and_ad_groups_batch(
+    client: GoogleAdsClient,
+    customer_id: str,
+    ad_label_pairs: List[tuple],  # [(ad_group_ad_resource, label_resource), ...]
+    ad_group_label_pairs: List[tuple]  # [(ad_group_resource, label_resource), ...]
+) -> int:
+    """Apply ad labels and ad group labels together through GoogleAdsService.Mutate.
+
+    Both kinds of operation go into the same MutateOperation requests, so a customer
+    needs one call instead of one per label service. partial_failure keeps a bad
+    label from rolling back the others, matching the separate-call behaviour.
+    Returns count of successful labels.
+    """
+
+    def _label():
+        # DEDUPLICATE: Remove duplicate pairs to avoid "Cannot mutate the same resource twice" error
+        unique_ad_pairs = set(ad_label_pairs)
+        unique_ag_pairs = set(ad_group_label_pairs)
+        if not unique_ad_pairs and not unique_ag_pairs:
+            return 0
+
+        operations = []
+        for ad_resource, label_resource in unique_ad_pairs:
+            op = client.get_type("MutateOperation")
+            label = op.ad_group_ad_label_operation.create
+            label.ad_group_ad = ad_resource
+            label.label = label_resource
+            operations.append(op)
+        for ag_resource, label_resource in unique_ag_pairs:
+            op = client.get_type("MutateOperation")
+            label = op.ad_group_label_operation.create
+            label.ad_group = ag_resource
+            label.label = label_resource
+            operations.append(op)
+
+        service = client.get_service("GoogleAdsService")
+        total_labeled = 0
+
+        # Google Ads API limit: 10,000 operations per request
+        BATCH_LIMIT = 10000
+
+        # Process in chunks
+        for chunk_start in range(0, len(operations), BATCH_LIMIT):
+            chunk = operations[chunk_start:chunk_start + BATCH_LIMIT]
+            chunk_num = chunk_start//BATCH_LIMIT + 1
+
+            try:
+                response = service.mutate(
+                    customer_id=customer_id,
+                    mutate_operations=chunk,
+                    partial_failure=True
+                )
+                labeled = sum(
+                    1 for res in response.mutate_operation_responses
+                    if res.ad_group_ad_label_result.resource_name or res.ad_group_label_result.resource_name
+                )
+                total_labeled += labeled
+                if response.partial_failure_error.message:
+                    logger.warning(f"Some labels failed in chunk {chunk_num}: {response.partial_failure_error.message}")
+                logger.debug(f"Applied {labeled} labels in chunk {chunk_num}")
+
+            except GoogleAdsException as e:
+                logger.warning(f"Labels failed in chunk {chunk_num}: {e}")
+
+        logger.info(
+            f"Labeled {total_labeled} of {len(unique_ad_pairs)} ad + {len(unique_ag_pairs)} ad group labels"
+        )
+        return total_labeled
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, _label)
+
+
 @async_retry(max_attempts=3, delay=1.0)
 async def get_ads_by_label(
     client: GoogleAdsClient,
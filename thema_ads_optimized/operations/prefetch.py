@@ -2,7 +2,9 @@
 
 import asyncio
 import logging
-from typing import Dict, List
+from collections import defaultdict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
 from google.ads.googleads.client import GoogleAdsClient
 from models import CachedData, ExistingAd
 from utils.retry import async_retry
@@ -10,12 +12,55 @@ from utils.retry import async_retry
 logger = logging.getLogger(__name__)
 
 
+# Batched GAQL templates; only the quoted resource list varies per batch
+EXISTING_ADS_QUERY_TMPL = """
+    SELECT
+        ad_group_ad.ad_group,
+        ad_group_ad.resource_name,
+        ad_group_ad.status,
+        ad_group_ad.ad.id,
+        ad_group_ad.ad.final_urls,
+        ad_group_ad.ad.responsive_search_ad.headlines,
+        ad_group_ad.ad.responsive_search_ad.descriptions,
+        ad_group_ad.ad.responsive_search_ad.path1,
+        ad_group_ad.ad.responsive_search_ad.path2,
+        ad_group_ad.labels
+    FROM ad_group_ad
+    WHERE ad_group_ad.ad_group IN ({resources})
+        AND ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
+        AND ad_group_ad.status != REMOVED
+    ORDER BY ad_group_ad.status ASC
+"""
+
+AD_GROUP_LABELS_QUERY_TMPL = """
+    SELECT
+        ad_group_label.ad_group,
+        ad_group_label.label
+    FROM ad_group_label
+    WHERE ad_group_label.ad_group IN ({resources})
+"""
+
+
+# Blocking queries one prefetch_customer_data call runs concurrently (labels, ads, ad group labels)
+PREFETCH_QUERIES = 3
+
+
+def quote_resources(resources: List[str]) -> str:
+    """Render resource names as a GAQL IN list ('a', 'b', ...) with a single join."""
+    return "'" + "', '".join(resources) + "'"
+
+
 @async_retry(max_attempts=3, delay=1.0)
-async def prefetch_labels(client: GoogleAdsClient, customer_id: str) -> Dict[str, str]:
+async def prefetch_labels(
+    client: GoogleAdsClient,
+    customer_id: str,
+    ga_service=None,
+    executor: Optional[Executor] = None
+) -> Dict[str, str]:
     """Fetch all labels for a customer in one query."""
 
     def _fetch():
-        ga_service = client.get_service("GoogleAdsService")
+        service = ga_service or client.get_service("GoogleAdsService")
         query = """
             SELECT label.resource_name, label.name
             FROM label
@@ -23,7 +68,7 @@ async def prefetch_labels(client: GoogleAdsClient, customer_id: str) -> Dict[str
 
         labels = {}
         try:
-            response = ga_service.search(customer_id=customer_id, query=query)
+            response = service.search(customer_id=customer_id, query=query)
             for row in response:
                 labels[row.label.name] = row.label.resource_name
             logger.debug(f"Prefetched {len(labels)} labels for customer {customer_id}")
@@ -34,7 +79,7 @@ async def prefetch_labels(client: GoogleAdsClient, customer_id: str) -> Dict[str
 
     # Run in executor to avoid blocking
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _fetch)
+    return await loop.run_in_executor(executor, _fetch)
 
 
 @async_retry(max_attempts=3, delay=1.0)
@@ -42,76 +87,79 @@ async def prefetch_existing_ads_bulk(
     client: GoogleAdsClient,
     customer_id: str,
     ad_group_resources: List[str],
-    batch_size: int = 7500
-) -> Dict[str, ExistingAd]:
-    """Fetch all existing RSAs for multiple ad groups in batched queries."""
+    batch_size: int = 7500,
+    ga_service=None,
+    executor: Optional[Executor] = None
+) -> tuple:
+    """Fetch all existing RSAs for multiple ad groups in batched, streamed queries.
+
+    ga_service may come from a raw-protobuf client; statuses are decoded with
+    client's (proto-plus) enum, which accepts the plain ints raw rows carry.
+
+    Returns (ads_map, rsa_details):
+        ads_map: ad_group_resource -> ExistingAd (first/best RSA per ad group)
+        rsa_details: ad_group_resource -> list of {ad_resource, status, label_resources}
+            for every non-removed RSA, used by the theme-ad cleanup step
+    """
 
     def _fetch():
-        ga_service = client.get_service("GoogleAdsService")
+        service = ga_service or client.get_service("GoogleAdsService")
 
         # Build resource list for query
         if not ad_group_resources:
-            return {}
+            return {}, {}
 
         # Use dynamic batch size
         ads_map = {}
+        rsa_details = defaultdict(list)
+        ad_status_enum = client.enums.AdGroupAdStatusEnum
 
         try:
             for i in range(0, len(ad_group_resources), batch_size):
                 batch = ad_group_resources[i:i + batch_size]
-                resources_str = ", ".join(f"'{r}'" for r in batch)
-
-                query = f"""
-                    SELECT
-                        ad_group_ad.ad_group,
-                        ad_group_ad.resource_name,
-                        ad_group_ad.status,
-                        ad_group_ad.ad.id,
-                        ad_group_ad.ad.final_urls,
-                        ad_group_ad.ad.responsive_search_ad.headlines,
-                        ad_group_ad.ad.responsive_search_ad.descriptions,
-                        ad_group_ad.ad.responsive_search_ad.path1,
-                        ad_group_ad.ad.responsive_search_ad.path2
-                    FROM ad_group_ad
-                    WHERE ad_group_ad.ad_group IN ({resources_str})
-                        AND ad_group_ad.ad.type = RESPONSIVE_SEARCH_AD
-                        AND ad_group_ad.status != REMOVED
-                    ORDER BY ad_group_ad.status ASC
-                """
-
-                response = ga_service.search(customer_id=customer_id, query=query)
-
-                for row in response:
-                    ad_group_resource = row.ad_group_ad.ad_group
-
-                    # Only store first (best) ad per ad group
-                    if ad_group_resource in ads_map:
-                        continue
-
-                    rsa = row.ad_group_ad.ad.responsive_search_ad
-                    headlines = [a.text for a in getattr(rsa, "headlines", [])] if rsa and rsa.headlines else []
-                    descriptions = [a.text for a in getattr(rsa, "descriptions", [])] if rsa and rsa.descriptions else []
-                    final_urls = list(row.ad_group_ad.ad.final_urls) if row.ad_group_ad.ad.final_urls else []
-
-                    ads_map[ad_group_resource] = ExistingAd(
-                        resource_name=row.ad_group_ad.resource_name,
-                        status=str(row.ad_group_ad.status),
-                        headlines=headlines,
-                        descriptions=descriptions,
-                        final_urls=final_urls,
-                        path1=getattr(rsa, "path1", "") or "",
-                        path2=getattr(rsa, "path2", "") or ""
-                    )
+                query = EXISTING_ADS_QUERY_TMPL.format(resources=quote_resources(batch))
+
+                stream = service.search_stream(customer_id=customer_id, query=query)
+
+                for response_batch in stream:
+                    for row in response_batch.results:
+                        ad_group_resource = row.ad_group_ad.ad_group
+                        status = ad_status_enum(row.ad_group_ad.status).name
+
+                        rsa_details[ad_group_resource].append({
+                            'ad_resource': row.ad_group_ad.resource_name,
+                            'status': status,
+                            'label_resources': tuple(row.ad_group_ad.labels)
+                        })
+
+                        # Only store first (best) ad per ad group
+                        if ad_group_resource in ads_map:
+                            continue
+
+                        rsa = row.ad_group_ad.ad.responsive_search_ad
+                        headlines = [a.text for a in rsa.headlines]
+                        descriptions = [a.text for a in rsa.descriptions]
+                        final_urls = list(row.ad_group_ad.ad.final_urls)
+
+                        ads_map[ad_group_resource] = ExistingAd(
+                            resource_name=row.ad_group_ad.resource_name,
+                            status=status,
+                            headlines=headlines,
+                            descriptions=descriptions,
+                            final_urls=final_urls,
+                            path1=rsa.path1 or "",
+                            path2=rsa.path2 or ""
+                        )
 
             logger.info(f"Prefetched {len(ads_map)} existing ads for {len(ad_group_resources)} ad groups (in {len(ad_group_resources)//batch_size + 1} batches)")
         except Exception as e:
             logger.error(f"Failed to prefetch ads for customer {customer_id}: {e}")
 
-        return ads_map
+        return ads_map, dict(rsa_details)
 
     # Run in executor to avoid blocking
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _fetch)
+    return await loop.run_in_executor(executor, _fetch)
 
 
 @async_retry(max_attempts=3, delay=1.0)
@@ -120,7 +168,9 @@ async def prefetch_ad_group_labels(
     customer_id: str,
     ad_group_resources: List[str],
     label_names: List[str] = None,
-    batch_size: int = 7500
+    batch_size: int = 7500,
+    ga_service=None,
+    executor: Optional[Executor] = None
 ) -> Dict[str, set]:
     """Check which DONE labels each ad group has. Returns {ad_group_resource: set_of_label_names}."""
 
@@ -128,7 +178,7 @@ async def prefetch_ad_group_labels(
         if not ad_group_resources:
             return {}
 
-        ga_service = client.get_service("GoogleAdsService")
+        service = ga_service or client.get_service("GoogleAdsService")
         # Initialize with empty sets
         ag_labels_map = {ag_res: set() for ag_res in ad_group_resources}
 
@@ -148,7 +198,7 @@ async def prefetch_ad_group_labels(
                 WHERE label.name = '{label_name}'
             """
             try:
-                label_search = ga_service.search(customer_id=customer_id, query=label_query)
+                label_search = service.search(customer_id=customer_id, query=label_query)
                 for row in label_search:
                     label_resources_map[label_name] = row.label.resource_name
                     break
@@ -166,17 +216,9 @@ async def prefetch_ad_group_labels(
         try:
             for i in range(0, len(ad_group_resources), batch_size):
                 batch = ad_group_resources[i:i + batch_size]
-                resources_str = ", ".join(f"'{r}'" for r in batch)
+                query = AD_GROUP_LABELS_QUERY_TMPL.format(resources=quote_resources(batch))
 
-                query = f"""
-                    SELECT
-                        ad_group_label.ad_group,
-                        ad_group_label.label
-                    FROM ad_group_label
-                    WHERE ad_group_label.ad_group IN ({resources_str})
-                """
-
-                response = ga_service.search(customer_id=customer_id, query=query)
+                response = service.search(customer_id=customer_id, query=query)
 
                 for row in response:
                     label_resource = row.ad_group_label.label
@@ -195,25 +237,41 @@ async def prefetch_ad_group_labels(
         return ag_labels_map
 
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _fetch)
+    return await loop.run_in_executor(executor, _fetch)
 
 
 async def prefetch_customer_data(
     client: GoogleAdsClient,
     customer_id: str,
     ad_group_resources: List[str],
-    batch_size: int = 7500
+    batch_size: int = 7500,
+    ga_service=None,
+    executor: Optional[Executor] = None
 ) -> CachedData:
-    """Prefetch all required data for a customer in parallel."""
+    """Prefetch all required data for a customer in parallel.
+
+    ga_service (e.g. from a raw-protobuf read client) and executor default to a
+    service from client and the event loop's default executor.
+    """
 
     logger.info(f"Prefetching data for customer {customer_id} ({len(ad_group_resources)} ad groups, batch_size={batch_size})")
 
     # Fetch labels, ads, and ad group labels in parallel
-    labels_task = prefetch_labels(client, customer_id)
-    ads_task = prefetch_existing_ads_bulk(client, customer_id, ad_group_resources, batch_size=batch_size)
-    ag_labels_task = prefetch_ad_group_labels(client, customer_id, ad_group_resources, batch_size=batch_size)
+    labels_task = prefetch_labels(client, customer_id, ga_service=ga_service, executor=executor)
+    ads_task = prefetch_existing_ads_bulk(
+        client, customer_id, ad_group_resources, batch_size=batch_size, ga_service=ga_service, executor=executor
+    )
+    ag_labels_task = prefetch_ad_group_labels(
+        client, customer_id, ad_group_resources, batch_size=batch_size, ga_service=ga_service, executor=executor
+    )
+
+    labels, (existing_ads, rsa_details), ag_done_labels = await asyncio.gather(labels_task, ads_task, ag_labels_task)
 
-    labels, existing_ads, ag_done_labels = await asyncio.gather(labels_task, ads_task, ag_labels_task)
+    # Invert to DONE label -> ad groups, so the skip check is one set lookup per ad group
+    done_ag_resources = defaultdict(set)
+    for ag_res, label_names in ag_done_labels.items():
+        for label_name in label_names:
+            done_ag_resources[label_name].add(ag_res)
 
     logger.info(
         f"Prefetch complete for {customer_id}: "
@@ -224,5 +282,7 @@ async def prefetch_customer_data(
         labels=labels,
         existing_ads=existing_ads,
         campaigns={},  # Not needed for this use case
-        ad_group_labels=ag_done_labels  # Map of ad_group_resource -> set of DONE label names
+        ad_group_labels=ag_done_labels,  # Map of ad_group_resource -> set of DONE label names
+        done_ag_resources=dict(done_ag_resources),  # Map of DONE label name -> set of ad_group_resources
+        rsa_details=rsa_details  # Map of ad_group_resource -> all non-removed RSAs with status and labels
     )
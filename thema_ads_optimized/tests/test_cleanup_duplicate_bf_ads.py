@@ -0,0 +1,72 @@
+"""Tests for the Black Friday duplicate scan in cleanup_duplicate_bf_ads."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.ads.googleads")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from google.ads.googleads.client import GoogleAdsClient
+
+from cleanup_duplicate_bf_ads import DuplicateAdCleaner
+
+CUSTOMER_ID = "1234567890"
+BF_DONE = f"customers/{CUSTOMER_ID}/labels/1"
+THEME_BF = f"customers/{CUSTOMER_ID}/labels/2"
+
+
+def make_row(ad_id, status, labels):
+    """Raw-protobuf-like row: the status is a plain int, as use_proto_plus=False returns it."""
+    rsa = SimpleNamespace(
+        headlines=[SimpleNamespace(text="Black Friday deals")],
+        descriptions=[SimpleNamespace(text="Shop now")],
+    )
+    return SimpleNamespace(
+        ad_group=SimpleNamespace(id=42, name="AG 42"),
+        ad_group_ad=SimpleNamespace(
+            resource_name=f"customers/{CUSTOMER_ID}/adGroupAds/42~{ad_id}",
+            status=status,
+            labels=labels,
+            ad=SimpleNamespace(id=ad_id, responsive_search_ad=rsa, final_urls=["https://example.com"]),
+        ),
+    )
+
+
+class FakeGoogleAdsService:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def search(self, customer_id, query):
+        return [
+            SimpleNamespace(label=SimpleNamespace(name="THEME_BF_DONE", resource_name=BF_DONE)),
+            SimpleNamespace(label=SimpleNamespace(name="THEME_BF", resource_name=THEME_BF)),
+        ]
+
+    def search_stream(self, customer_id, query):
+        return [SimpleNamespace(results=self.rows)]
+
+
+def make_cleaner(rows):
+    cleaner = DuplicateAdCleaner.__new__(DuplicateAdCleaner)
+    cleaner.client = GoogleAdsClient(credentials=None, developer_token="test", use_proto_plus=True)
+    cleaner.ga_service = FakeGoogleAdsService(rows)
+    return cleaner
+
+
+def test_find_duplicates_decodes_int_status():
+    status_enum = GoogleAdsClient(credentials=None, developer_token="test", use_proto_plus=True).enums.AdGroupAdStatusEnum
+    rows = [
+        make_row(1, int(status_enum.ENABLED), [BF_DONE, THEME_BF]),
+        make_row(2, int(status_enum.PAUSED), []),
+    ]
+
+    duplicates = asyncio.run(make_cleaner(rows).find_duplicates(CUSTOMER_ID))
+
+    assert [ad.status for ad in duplicates["42"]["labeled"]] == ["ENABLED"]
+    assert [ad.status for ad in duplicates["42"]["unlabeled"]] == ["PAUSED"]
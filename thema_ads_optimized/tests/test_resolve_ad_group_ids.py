@@ -0,0 +1,97 @@
+"""Tests for ad group ID resolution by name in ThemaAdsProcessor."""
+
+import asyncio
+import concurrent.futures
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("google.ads.googleads")
+pytest.importorskip("pandas")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main_optimized
+from main_optimized import ThemaAdsProcessor, needs_name_lookup
+from models import AdGroupInput
+
+
+def make_input(ad_group_id, ad_group_name=None):
+    return AdGroupInput(
+        customer_id="1234567890",
+        campaign_name="Campaign",
+        campaign_id="111",
+        ad_group_id=ad_group_id,
+        ad_group_name=ad_group_name,
+    )
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """Processor without a Google Ads client; the name -> ID fetch is faked per test."""
+    monkeypatch.setattr(main_optimized, "_ad_group_id_cache", {})
+    proc = ThemaAdsProcessor.__new__(ThemaAdsProcessor)
+    proc._io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    proc._refreshed_ad_group_ids = set()
+    proc.fetch_calls = 0
+    yield proc
+    proc._io_executor.shutdown(wait=True)
+
+
+def use_name_map(processor, name_to_id):
+    def fetch(customer_id):
+        processor.fetch_calls += 1
+        return dict(name_to_id)
+    processor._fetch_ad_group_ids = fetch
+
+
+def test_needs_name_lookup_with_digit_id_and_name():
+    # '1.76256E+11' arrives from the backend as '176256000000': digits, but wrong
+    assert needs_name_lookup(make_input("176256000000", "AG one"))
+
+
+def test_needs_name_lookup_without_name():
+    assert not needs_name_lookup(make_input("176256012345"))
+
+
+def test_converted_scientific_notation_id_is_corrected(processor):
+    use_name_map(processor, {"AG one": "176256012345"})
+    inputs = [make_input("176256000000", "AG one")]
+
+    resolved = asyncio.run(processor._resolve_ad_group_ids("1234567890", inputs))
+
+    assert [inp.ad_group_id for inp in resolved] == ["176256012345"]
+
+
+def test_matching_id_is_kept_as_is(processor):
+    use_name_map(processor, {"AG one": "176256012345"})
+    inputs = [make_input("176256012345", "AG one")]
+
+    resolved = asyncio.run(processor._resolve_ad_group_ids("1234567890", inputs))
+
+    assert resolved[0] is inputs[0]
+
+
+def test_inputs_without_name_skip_the_lookup(processor):
+    use_name_map(processor, {"AG one": "176256012345"})
+    inputs = [make_input("176256000000"), make_input("176256000001")]
+
+    resolved = asyncio.run(processor._resolve_ad_group_ids("1234567890", inputs))
+
+    assert resolved == inputs
+    assert processor.fetch_calls == 0
+
+
+def test_resolved_inputs_keep_caller_order(processor):
+    use_name_map(processor, {"AG one": "1", "AG two": "2"})
+    inputs = [
+        make_input("900", "AG two"),
+        make_input("555"),
+        make_input("901", "AG one"),
+        make_input("902", "AG missing"),
+    ]
+
+    resolved = asyncio.run(processor._resolve_ad_group_ids("1234567890", inputs))
+
+    assert [inp.ad_group_id for inp in resolved] == ["2", "555", "1", "902"]
@@ -1,6 +1,7 @@
 """Theme management for multi-theme ads system."""
 
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple
 from dataclasses import dataclass
@@ -139,6 +140,7 @@ def load_theme_content(theme_name: str) -> ThemeContent:
     )
 
 
+@lru_cache(maxsize=256)
 def get_theme_label(theme_name: str) -> str:
     """Get the Google Ads label name for a theme.
 
@@ -163,6 +165,10 @@ def get_all_theme_labels() -> List[str]:
     return [info["label"] for info in SUPPORTED_THEMES.values()]
 
 
+# All theme labels as a set, for membership checks in hot paths
+ALL_THEME_LABELS_SET = frozenset(get_all_theme_labels())
+
+
 def normalize_theme_name(theme_name: str) -> str:
     """Normalize theme name to match supported themes.
 
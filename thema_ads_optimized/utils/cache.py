@@ -1,7 +1,11 @@
 """Caching utilities for performance optimization."""
 
-from typing import Dict, Any, Optional
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+import json
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -64,3 +68,46 @@ class GlobalCache:
         self._campaigns.clear()
         self._ad_groups.clear()
         logger.debug("Cleared entire cache")
+
+
+def cached_json(path: Path, loader: Callable[[], Any], ttl: float = 3600, use_cache: bool = True) -> Any:
+    """
+    Return JSON data cached on disk, reloading it when older than ttl seconds.
+
+    The cache file is written to a temp file and moved into place with
+    os.replace, so concurrent runs never read a half-written file. Empty
+    results are returned but not cached, so a failed lookup is retried.
+    """
+    path = Path(path)
+
+    if use_cache:
+        try:
+            if time.time() - path.stat().st_mtime < ttl:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                logger.info(f"Loaded {len(data)} cached entries from {path}")
+                return data
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache {path}: {e}")
+
+    data = loader()
+    if not data:
+        return data
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write cache {path}: {e}")
+
+    return data
+
+
+def cached_list(path: Path, loader: Callable[[], List[Any]], ttl: float = 3600, use_cache: bool = True) -> List[Any]:
+    """Return a JSON list cached on disk; see cached_json."""
+    return cached_json(path, lambda: list(loader()), ttl=ttl, use_cache=use_cache)
@@ -1,5 +1,6 @@
 """Adaptive rate limiter for Google Ads API operations."""
 
+import asyncio
 import time
 import logging
 
@@ -77,3 +78,49 @@ class AdaptiveRateLimiter:
         self.current_delay = self.min_delay
         self.success_count = 0
         self.error_count = 0
+
+
+class CreditSemaphore:
+    """
+    Async token bucket: callers spend credits that are refunded after a time window.
+
+    Mirrors the Google Ads quota model, where each operation consumes capacity that
+    becomes available again once the window has passed. Unlike a fixed sleep between
+    customers, work starts immediately whenever enough credits are free.
+    """
+
+    def __init__(self, capacity: int, refund_time: float = 60.0):
+        """
+        Initialize credit semaphore.
+
+        Args:
+            capacity: Total credits available per window
+            refund_time: Seconds after acquisition before credits are returned
+        """
+        self.capacity = capacity
+        self.available = capacity
+        self.refund_time = refund_time
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, credits: int) -> int:
+        """Wait until `credits` are free and take them; returns the amount taken."""
+        # A single request larger than the bucket would never fit, so clamp it
+        credits = max(0, min(credits, self.capacity))
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.available >= credits)
+            self.available -= credits
+        return credits
+
+    async def release(self, credits: int):
+        """Return credits to the bucket and wake waiters."""
+        async with self._condition:
+            self.available = min(self.capacity, self.available + credits)
+            self._condition.notify_all()
+
+    async def transact(self, coro, credits: int, refund_time: float = None):
+        """Await `coro` once `credits` are available; they are refunded `refund_time` seconds after acquisition."""
+        refund_time = self.refund_time if refund_time is None else refund_time
+        taken = await self.acquire(credits)
+        loop = asyncio.get_running_loop()
+        loop.call_later(refund_time, lambda: asyncio.ensure_future(self.release(taken)))
+        return await coro
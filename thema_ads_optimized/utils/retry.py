@@ -6,15 +6,47 @@ import random
 from functools import wraps
 from typing import Callable, Any
 from google.ads.googleads.errors import GoogleAdsException
-from google.api_core.exceptions import ServiceUnavailable
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for the randomized backoff after 429 RESOURCE_EXHAUSTED
+RATE_LIMIT_MAX_DELAY = 60.0
+
+
+def _rate_limit_delay(delay: float, attempt: int) -> float:
+    """Random exponential backoff ("full jitter"): uniform in [0, delay * 2^(attempt-1)], capped."""
+    return random.uniform(0, min(RATE_LIMIT_MAX_DELAY, delay * (2 ** (attempt - 1))))
+
+
+# QuotaError codes that mean "slow down" rather than a permanent quota problem
+RETRYABLE_QUOTA_ERRORS = ('RESOURCE_EXHAUSTED', 'RESOURCE_TEMPORARILY_EXHAUSTED')
+
+
+def is_quota_throttled(e: GoogleAdsException) -> bool:
+    """True when a GoogleAdsException carries a retryable quota_error (API throttling)."""
+    failure = getattr(e, 'failure', None)
+    if not failure:
+        return False
+    for error in failure.errors:
+        quota_error = getattr(error.error_code, 'quota_error', None)
+        name = getattr(quota_error, 'name', None)
+        if name is None and isinstance(quota_error, int):
+            # Raw protobuf (use_proto_plus=False) failures carry plain ints
+            field = error.error_code.DESCRIPTOR.fields_by_name['quota_error']
+            value = field.enum_type.values_by_number.get(quota_error)
+            name = value.name if value else None
+        if name in RETRYABLE_QUOTA_ERRORS:
+            return True
+    return False
+
 
 def async_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0):
     """Decorator for async functions with exponential backoff retry.
 
-    Handles 503 errors with extended delays (60s, 180s, 540s, 1620s).
+    Handles 503 errors with extended delays (60s, 180s, 540s, 1620s) and
+    429 RESOURCE_EXHAUSTED (bare, or as a GoogleAdsException quota_error)
+    with randomized exponential backoff.
     """
 
     def decorator(func: Callable) -> Callable:
@@ -27,6 +59,22 @@ def async_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0)
                 try:
                     return await func(*args, **kwargs)
 
+                except ResourceExhausted as e:
+                    # 429: spread retries out randomly so concurrent customers don't retry in lockstep
+                    last_exception = e
+
+                    if attempt < max_attempts:
+                        retry_delay = _rate_limit_delay(delay, attempt)
+                        logger.warning(
+                            f"Rate limited (429) in {func.__name__}. "
+                            f"Attempt {attempt}/{max_attempts}. "
+                            f"Waiting {retry_delay:.1f}s before retry..."
+                        )
+                        await asyncio.sleep(retry_delay)
+                    else:
+                        logger.error(f"All {max_attempts} attempts failed for {func.__name__} due to rate limiting")
+                        raise last_exception
+
                 except ServiceUnavailable as e:
                     # Handle 503 errors with much longer delays
                     last_exception = e
@@ -47,6 +95,20 @@ def async_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0)
                 except GoogleAdsException as e:
                     last_exception = e
 
+                    # Quota throttling (429) arrives as a quota_error; back off randomly like ResourceExhausted
+                    if is_quota_throttled(e):
+                        if attempt < max_attempts:
+                            retry_delay = _rate_limit_delay(delay, attempt)
+                            logger.warning(
+                                f"Rate limited (quota) in {func.__name__}. "
+                                f"Attempt {attempt}/{max_attempts}. "
+                                f"Waiting {retry_delay:.1f}s before retry..."
+                            )
+                            await asyncio.sleep(retry_delay)
+                            continue
+                        logger.error(f"All {max_attempts} attempts failed for {func.__name__} due to rate limiting")
+                        raise
+
                     # Check for CONCURRENT_MODIFICATION errors
                     is_concurrent_modification = False
                     if hasattr(e, 'failure') and e.failure:
@@ -108,7 +170,9 @@ def async_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0)
 def sync_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0):
     """Decorator for sync functions with exponential backoff retry.
 
-    Handles 503 errors with extended delays (60s, 180s, 540s, 1620s).
+    Handles 503 errors with extended delays (60s, 180s, 540s, 1620s) and
+    429 RESOURCE_EXHAUSTED (bare, or as a GoogleAdsException quota_error)
+    with randomized exponential backoff.
     """
 
     def decorator(func: Callable) -> Callable:
@@ -122,6 +186,22 @@ def sync_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0):
                 try:
                     return func(*args, **kwargs)
 
+                except ResourceExhausted as e:
+                    # 429: spread retries out randomly so concurrent callers don't retry in lockstep
+                    last_exception = e
+
+                    if attempt < max_attempts:
+                        retry_delay = _rate_limit_delay(delay, attempt)
+                        logger.warning(
+                            f"Rate limited (429) in {func.__name__}. "
+                            f"Attempt {attempt}/{max_attempts}. "
+                            f"Waiting {retry_delay:.1f}s before retry..."
+                        )
+                        time.sleep(retry_delay)
+                    else:
+                        logger.error(f"All {max_attempts} attempts failed for {func.__name__} due to rate limiting")
+                        raise last_exception
+
                 except ServiceUnavailable as e:
                     # Handle 503 errors with much longer delays
                     last_exception = e
@@ -142,6 +222,20 @@ def sync_retry(max_attempts: int = 5, delay: float = 2.0, backoff: float = 2.0):
                 except GoogleAdsException as e:
                     last_exception = e
 
+                    # Quota throttling (429) arrives as a quota_error; back off randomly like ResourceExhausted
+                    if is_quota_throttled(e):
+                        if attempt < max_attempts:
+                            retry_delay = _rate_limit_delay(delay, attempt)
+                            logger.warning(
+                                f"Rate limited (quota) in {func.__name__}. "
+                                f"Attempt {attempt}/{max_attempts}. "
+                                f"Waiting {retry_delay:.1f}s before retry..."
+                            )
+                            time.sleep(retry_delay)
+                            continue
+                        logger.error(f"All {max_attempts} attempts failed for {func.__name__} due to rate limiting")
+                        raise
+
                     # Check for CONCURRENT_MODIFICATION errors
                     is_concurrent_modification = False
                     if hasattr(e, 'failure') and e.failure: